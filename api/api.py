@@ -1,15 +1,9 @@
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.routing import APIRoute
 
 from api.routers.monster import monster_router
 
-app = FastAPI(
-    title="Tsubotki API",
-    description="Tsubotki API",
-    version="0.0.1",
-)
-
 origins = [
     "http://localhost",
     "http://localhost:3000",
@@ -18,16 +12,6 @@ origins = [
     "http://teambuilder.tsubakibot.com",
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(monster_router, prefix="/monster", tags=["monster"], )
-
 
 def use_route_names_as_operation_ids(app: FastAPI) -> None:
     for route in app.routes:
@@ -35,4 +19,26 @@ def use_route_names_as_operation_ids(app: FastAPI) -> None:
             route.operation_id = route.name  # in this case, 'read_items'
 
 
-use_route_names_as_operation_ids(app)
+def build_app(monster_router: APIRouter) -> FastAPI:
+    """The API app around a set of monster routes.  Worker processes build theirs with their own routes."""
+    app = FastAPI(
+        title="Tsubotki API",
+        description="Tsubotki API",
+        version="0.0.1",
+    )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.include_router(monster_router, prefix="/monster", tags=["monster"], )
+
+    use_route_names_as_operation_ids(app)
+    return app
+
+
+app = build_app(monster_router)
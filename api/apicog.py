@@ -1,26 +1,116 @@
 import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import secrets
+import time
+from typing import Optional
 
-from redbot.core import commands
-from uvicorn import Server, Config
+import uvicorn
+from redbot.core import Config, checks, commands, data_manager
+
+from dbcog.find_monster.find_monster import FindMonster
 
 from .api import app
 from .botref import set_bot
+from .export import write_export
+from .ipc import QueryServer
+from .response_cache import response_cache
+from .worker import run_workers
+
+logger = logging.getLogger('red.padbot-cogs.api')
+
+HOST = "0.0.0.0"
+PORT = 8001
+
+
+def _data_file(file_name: str) -> str:
+    return os.path.join(str(data_manager.cog_data_path(raw_name='api')), file_name)
 
 
 class APICog(commands.Cog):
-    server: Server
+    server: Optional[uvicorn.Server] = None
+    worker_process: Optional[multiprocessing.Process] = None
+    query_server: Optional[QueryServer] = None
 
     def __init__(self, bot, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.bot = bot
         set_bot(bot)
 
+        self.config = Config.get_conf(self, identifier=7180011)
+        self.config.register_global(workers=0)
+        self.export_file_path = _data_file('api_export.bin')
+
+    @commands.group()
+    @checks.is_owner()
+    async def api(self, ctx):
+        """API server settings"""
+
+    @api.command()
+    async def workers(self, ctx, count: int):
+        """Serve the API from this many separate processes, or from inside the bot if 0
+
+        Takes effect the next time the cog is loaded.
+        """
+        if count < 0:
+            await ctx.send("The number of workers can't be negative.")
+            return
+        await self.config.workers.set(count)
+        await ctx.tick()
+
+    @commands.Cog.listener('on_dbcog_reload')
+    async def materialize_responses(self, generation: int):
+        """Serialize every monster response up front whenever DBCog loads a new database"""
+        dbcog = self.bot.get_cog("DBCog")
+        graph = dbcog.database.graph
+        servers = [dbcog.DEFAULT_SERVER]
+        start = time.perf_counter()
+        materialized = await asyncio.get_running_loop().run_in_executor(
+            None, response_cache.materialize, graph, servers)
+        # Another load may have finished while this one was being built
+        if generation != dbcog.index_generation:
+            return
+
+        if self.worker_process is None:
+            response_cache.install(materialized, generation)
+        else:
+            def export():
+                finder = FindMonster(dbcog, dbcog.fm_flags_default)
+                numbers = {token: m for token in finder.index.manual
+                           if re.fullmatch(r'[0-9]+', token) and (m := finder.monster_by_number(token))}
+                write_export(self.export_file_path, generation, graph, servers, materialized, numbers)
+
+            await asyncio.get_running_loop().run_in_executor(None, export)
+        logger.info(f"Materialized API responses for generation {generation} "
+                    f"in {time.perf_counter() - start:.2f}s")
+
     async def entrypoint(self):
-        config = Config(app, host="0.0.0.0", port=8001, log_level="info")
-        self.server = Server(config=config)
-        await asyncio.create_task(self.server.serve())
+        workers = await self.config.workers()
+        if workers:
+            authkey = secrets.token_bytes(32)
+            self.query_server = QueryServer(self.bot, asyncio.get_running_loop(), authkey)
+            self.worker_process = multiprocessing.get_context('spawn').Process(
+                target=run_workers, name='api-workers',
+                args=(self.export_file_path, self.query_server.address, authkey, HOST, PORT, workers))
+            self.worker_process.start()
+
+        dbcog = self.bot.get_cog("DBCog")
+        if dbcog is not None and dbcog.index_generation:
+            asyncio.create_task(self.materialize_responses(dbcog.index_generation))
+
+        if self.worker_process is None:
+            config = uvicorn.Config(app, host=HOST, port=PORT, log_level="info")
+            self.server = uvicorn.Server(config=config)
+            await asyncio.create_task(self.server.serve())
 
     async def cog_unload(self) -> None:
-        self.server.should_exit = True
-        self.server.force_exit = True
-        await self.server.shutdown()
+        if self.worker_process is not None:
+            self.worker_process.terminate()
+            await asyncio.get_running_loop().run_in_executor(None, self.worker_process.join, 10)
+            self.query_server.close()
+        if self.server is not None:
+            self.server.should_exit = True
+            self.server.force_exit = True
+            await self.server.shutdown()
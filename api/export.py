@@ -0,0 +1,118 @@
+"""
+Read-only exports of the API's serialized responses for out-of-process workers.
+
+An export is a single file: a magic string, the length of a JSON directory, the directory itself, and then
+every serialized response back to back.  The directory maps response keys to (offset, length) pairs in the
+blob section, plain monster numbers to the response key they resolve to, and monsters to their evo tree.
+Workers memory-map the file, so every worker process shares the same pages instead of holding its own copy.
+"""
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+
+from tsutils.enums import Server
+
+from api.response_cache import Materialized, MonsterResponseCache, response_key
+
+if TYPE_CHECKING:
+    from dbcog.models.monster_model import MonsterModel
+    from dbcog.monster_graph import MonsterGraph
+
+EXPORT_MAGIC = b'TSUBAPI1'
+LENGTH = struct.Struct('<Q')
+
+
+def write_export(path: str, generation: int, graph: "MonsterGraph", servers: Iterable[Server],
+                 materialized: Materialized, numbers: Dict[str, "MonsterModel"]) -> None:
+    monsters, trees = materialized
+    directory = {'generation': generation, 'monsters': {}, 'trees': {}, 'tree_of': {}, 'numbers': {}}
+    blobs: List[bytes] = []
+    offset = 0
+    for section, entries in (('monsters', monsters), ('trees', trees)):
+        for key, blob in entries.items():
+            directory[section][key] = (offset, len(blob))
+            blobs.append(blob)
+            offset += len(blob)
+    for server in servers:
+        for m in graph.get_all_monsters(server):
+            directory['tree_of'][response_key(server, m.monster_id)] = MonsterResponseCache.tree_key(graph, m)
+    for number, m in numbers.items():
+        directory['numbers'][number] = response_key(m.server_priority, m.monster_id)
+
+    header = json.dumps(directory, separators=(',', ':')).encode()
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(EXPORT_MAGIC)
+        f.write(LENGTH.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class ResponseExport:
+    """A memory-mapped view of the most recent export.  It's reopened whenever the file is replaced."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.generation: Optional[int] = None
+        self.numbers: Dict[str, str] = {}
+        self._stat = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._blobs_start = 0
+        self._monsters: Dict[str, List[int]] = {}
+        self._trees: Dict[str, List[int]] = {}
+        self._tree_of: Dict[str, str] = {}
+
+    def refresh(self) -> bool:
+        """Open the export if it's been replaced since it was last opened.  Returns whether one is available."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self._mmap is not None
+        if self._stat is not None and (stat.st_ino, stat.st_mtime_ns) == self._stat:
+            return True
+
+        with open(self.path, 'rb') as f:
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if view[:len(EXPORT_MAGIC)] != EXPORT_MAGIC:
+            view.close()
+            raise ValueError("{} is not an API export".format(self.path))
+        header_start = len(EXPORT_MAGIC) + LENGTH.size
+        header_length, = LENGTH.unpack_from(view, len(EXPORT_MAGIC))
+        directory = json.loads(view[header_start:header_start + header_length])
+
+        old_view = self._mmap
+        self._mmap = view
+        self._blobs_start = header_start + header_length
+        self.generation = directory['generation']
+        self.numbers = directory['numbers']
+        self._monsters = directory['monsters']
+        self._trees = directory['trees']
+        self._tree_of = directory['tree_of']
+        self._stat = (stat.st_ino, stat.st_mtime_ns)
+        if old_view is not None:
+            old_view.close()
+        return True
+
+    def _blob(self, entry: Optional[List[int]]) -> Optional[bytes]:
+        if entry is None:
+            return None
+        start = self._blobs_start + entry[0]
+        return self._mmap[start:start + entry[1]]
+
+    def monster(self, key: str) -> Optional[bytes]:
+        return self._blob(self._monsters.get(key))
+
+    def monsters(self, keys: Iterable[Optional[str]]) -> bytes:
+        blobs = [(self.monster(key) if key else None) or b'null' for key in keys]
+        return b'{"monsters":[' + b','.join(blobs) + b']}'
+
+    def monster_with_evos(self, key: str) -> Optional[bytes]:
+        monster = self.monster(key)
+        evolutions = self._blob(self._trees.get(self._tree_of.get(key)))
+        if monster is None or evolutions is None:
+            return None
+        return b'{"monster":' + monster + b',"evolutions":' + evolutions + b'}'
@@ -0,0 +1,98 @@
+"""
+A small local channel that lets API worker processes ask the bot to run fuzzy monster queries.
+
+Workers can answer plain monster numbers from the export on their own, but anything else needs the bot's
+indexes.  Each worker sends a (method, query) pair over an authenticated local socket.  find_monster gets
+back the response key of the matched monster or None, and find_monsters gets the ranked list of keys.
+"""
+import asyncio
+import logging
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import List, Optional, Tuple, Union
+
+from api.response_cache import response_key
+
+logger = logging.getLogger('red.padbot-cogs.api.ipc')
+
+Address = Tuple[str, int]
+
+
+class QueryServer:
+    """Runs in the bot process.  Each worker connection is served by its own thread."""
+
+    def __init__(self, bot, loop: asyncio.AbstractEventLoop, authkey: bytes):
+        self.bot = bot
+        self.loop = loop
+        self.listener = Listener(('127.0.0.1', 0), authkey=authkey)
+        self.address: Address = self.listener.address
+        threading.Thread(target=self._accept, name='api-query-server', daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                # The listener was closed
+                return
+            except Exception:
+                logger.exception("Rejected API worker connection")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), name='api-query-conn', daemon=True).start()
+
+    def _serve(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    method, query = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    result = asyncio.run_coroutine_threadsafe(self._call(method, query), self.loop).result()
+                except Exception:
+                    logger.exception(f"Failed to resolve API query {query!r}")
+                    result = None if method == 'find_monster' else []
+                conn.send(result)
+
+    async def _call(self, method: str, query: str) -> Union[Optional[str], List[str]]:
+        dbcog = self.bot.get_cog("DBCog")
+        if method == 'find_monster':
+            monster = await dbcog.find_monster(query)
+            return response_key(monster.server_priority, monster.monster_id) if monster else None
+        if method == 'find_monsters':
+            monsters, _ = await dbcog.find_monsters(query)
+            return [response_key(m.server_priority, m.monster_id) for m in monsters]
+        raise ValueError(f"Unknown method {method}")
+
+    def close(self) -> None:
+        self.listener.close()
+
+
+class QueryClient:
+    """Runs in a worker process.  Queries are sent one at a time over a single connection."""
+
+    def __init__(self, address: Address, authkey: bytes):
+        self.address = address
+        self.authkey = authkey
+        self._lock = threading.Lock()
+        self._conn: Optional[Connection] = None
+
+    def _call(self, method: str, query: str):
+        with self._lock:
+            if self._conn is None:
+                self._conn = Client(self.address, authkey=self.authkey)
+            try:
+                self._conn.send((method, query))
+                return self._conn.recv()
+            except (EOFError, OSError):
+                self._conn.close()
+                self._conn = None
+                raise
+
+    def find_monster(self, query: str) -> Optional[str]:
+        """Blocks until the bot answers, so call this from an executor"""
+        return self._call('find_monster', query)
+
+    def find_monsters(self, query: str) -> List[str]:
+        """Blocks until the bot answers, so call this from an executor"""
+        return self._call('find_monsters', query)
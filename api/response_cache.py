@@ -0,0 +1,122 @@
+import hashlib
+from typing import Dict, Iterable, Optional, Sequence, TYPE_CHECKING, Tuple
+
+from tsutils.enums import Server
+
+from api.responses.monster import MonsterResponse
+
+if TYPE_CHECKING:
+    from dbcog.models.monster_model import MonsterModel
+    from dbcog.monster_graph import MonsterGraph
+
+Materialized = Tuple[Dict[str, bytes], Dict[str, bytes]]
+
+
+class MonsterResponseCache:
+    """Serialized response JSON for a single DBCog index generation.
+
+    After every database load the APICog materializes the MonsterResponse of every monster and the list of
+    evolutions of every evo tree, so requests only have to look up and join bytes.  Anything that isn't
+    materialized yet is serialized on first use.  The whole cache is dropped the first time it's used with
+    a newer generation.
+    """
+
+    def __init__(self):
+        self.generation: Optional[int] = None
+        self._monsters: Dict[str, bytes] = {}
+        self._trees: Dict[str, bytes] = {}
+
+    def _use_generation(self, generation: int) -> None:
+        if generation != self.generation:
+            self._monsters = {}
+            self._trees = {}
+            self.generation = generation
+
+    @staticmethod
+    def _key(m: "MonsterModel") -> str:
+        return response_key(m.server_priority, m.monster_id)
+
+    @staticmethod
+    def tree_key(graph: "MonsterGraph", m: "MonsterModel") -> str:
+        """The key of the evo tree a monster is in"""
+        return response_key(m.server_priority, graph.get_alt_ids(m)[0])
+
+    @staticmethod
+    def _serialize(m: "MonsterModel") -> bytes:
+        return MonsterResponse.from_model(m).json().encode()
+
+    @classmethod
+    def _serialize_tree(cls, graph: "MonsterGraph", m: "MonsterModel", monsters: Dict[str, bytes]) -> bytes:
+        blobs = []
+        for evo in graph.get_alt_monsters(m):
+            if not evo:
+                continue
+            if (blob := monsters.get(cls._key(evo))) is None:
+                blob = monsters[cls._key(evo)] = cls._serialize(evo)
+            blobs.append(blob)
+        return b'[' + b','.join(blobs) + b']'
+
+    @classmethod
+    def materialize(cls, graph: "MonsterGraph", servers: Iterable[Server]) -> Materialized:
+        """Serialize every monster and evo tree in the graph.  This is slow, so run it in an executor."""
+        monsters = {}
+        trees = {}
+        for server in servers:
+            for m in graph.get_all_monsters(server):
+                if cls._key(m) not in monsters:
+                    monsters[cls._key(m)] = cls._serialize(m)
+                if cls.tree_key(graph, m) not in trees:
+                    trees[cls.tree_key(graph, m)] = cls._serialize_tree(graph, m, monsters)
+        return monsters, trees
+
+    def install(self, materialized: Materialized, generation: int) -> None:
+        """Replace the cache contents with a materialized generation"""
+        self.generation = generation
+        self._monsters, self._trees = materialized
+
+    def monster(self, m: "MonsterModel", generation: int) -> bytes:
+        self._use_generation(generation)
+        key = self._key(m)
+        if (blob := self._monsters.get(key)) is None:
+            blob = self._monsters[key] = self._serialize(m)
+        return blob
+
+    def monsters(self, ms: Sequence[Optional["MonsterModel"]], generation: int) -> bytes:
+        """The JSON of a MonstersResponse, assembled from the cached monsters"""
+        blobs = [self.monster(m, generation) if m else b'null' for m in ms]
+        return b'{"monsters":[' + b','.join(blobs) + b']}'
+
+    def monster_with_evos(self, graph: "MonsterGraph", m: "MonsterModel", generation: int) -> bytes:
+        """The JSON of a MonsterWithEvosResponse, assembled from the cached monster and evo tree"""
+        monster = self.monster(m, generation)
+        key = self.tree_key(graph, m)
+        if (evolutions := self._trees.get(key)) is None:
+            evolutions = self._trees[key] = self._serialize_tree(graph, m, self._monsters)
+        return b'{"monster":' + monster + b',"evolutions":' + evolutions + b'}'
+
+
+def response_key(server: Server, monster_id: int) -> str:
+    return "{}:{}".format(server.name, monster_id)
+
+
+def body_etag(*parts: bytes) -> str:
+    """An ETag that's the digest of the response body.
+
+    Index generations restart at 1 with every restart of the bot, so a tag made from them could match a
+    response from before the restart that had different data in it.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part)
+    return '"{}"'.format(digest.hexdigest())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Our responses are byte-for-byte identical for a given ETag, so weak comparison is fine
+    return "*" in tags or etag in tags or "W/" + etag in tags
+
+
+response_cache = MonsterResponseCache()
@@ -1,47 +1,136 @@
-from typing import Union
+from typing import Any, List, Optional, Sequence, Union
 
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Header, Query, HTTPException, Response
 
 from api.botref import get_bot
+from api.response_cache import body_etag, etag_matches, response_cache
+from api.search import SearchCache, search_etag, search_response
 from api.responses.monster import MonsterResponse, MonsterWithEvosResponse, MonstersResponse
 
-monster_router = APIRouter()
 
+class MonsterBackend:
+    """Where the monster routes find monsters and get their serialized responses.
 
-@monster_router.get("/{monster_id}", response_model=MonsterResponse)
-async def get(monster_id):
-    dbcog = get_bot().get_cog("DBCog")
-    monster = await dbcog.find_monster(monster_id)
+    The routes are shared between the API served from inside the bot and the API served from worker
+    processes.  A monster is whatever handle the backend likes, as long as the backend can serialize it.
+    """
 
-    if not monster:
-        raise HTTPException(status_code=404, detail={
-            "error": "No monster found for {}".format(monster_id),
-            "code": 404})
-    return MonsterResponse.from_model(monster)
+    def ensure_ready(self) -> None:
+        """Raise an HTTPException if there's no monster data to answer with yet"""
 
+    def generation(self) -> int:
+        raise NotImplementedError
 
-@monster_router.get("/get-many/", response_model=MonstersResponse)
-async def getManyById(q: Union[str, None] = Query(default=None, min_length=1)):
-    monster_ids = q.split(",")
+    async def find_monster(self, query: str) -> Optional[Any]:
+        raise NotImplementedError
 
-    dbcog = get_bot().get_cog("DBCog")
-    monsters = []
-    for monster_id in monster_ids:
-        monster = await dbcog.find_monster(monster_id)
-        monsters.append(monster)
+    async def find_monsters(self, query: str) -> List[Any]:
+        raise NotImplementedError
 
-    return MonstersResponse.from_model(monsters)
+    async def find_monsters_by_ids(self, query: str) -> List[Optional[Any]]:
+        raise NotImplementedError
 
+    def monster(self, monster: Any) -> Optional[bytes]:
+        raise NotImplementedError
 
-@monster_router.get("/team-builder/", response_model=MonsterWithEvosResponse)
-async def team_builder_query(q: Union[str, None] = Query(default=None, min_length=1)):
-    dbcog = get_bot().get_cog("DBCog")
-    monster = await dbcog.find_monster(q)
+    def monsters(self, monsters: Sequence[Optional[Any]]) -> bytes:
+        raise NotImplementedError
 
-    if not monster:
-        raise HTTPException(status_code=404, detail={
-            "error": "No monster found for {}".format(q),
-            "code": 404})
+    def monster_with_evos(self, monster: Any) -> Optional[bytes]:
+        raise NotImplementedError
 
-    alt_monsters = dbcog.database.graph.get_alt_monsters(monster)
-    return MonsterWithEvosResponse.from_model(monster, alt_monsters)
+
+class DBCogBackend(MonsterBackend):
+    """Looks monsters up in DBCog directly and serializes them through the response cache"""
+
+    @staticmethod
+    def _dbcog():
+        return get_bot().get_cog("DBCog")
+
+    def generation(self) -> int:
+        return self._dbcog().index_generation
+
+    async def find_monster(self, query):
+        return await self._dbcog().find_monster(query)
+
+    async def find_monsters(self, query):
+        monsters, _ = await self._dbcog().find_monsters(query)
+        return monsters
+
+    async def find_monsters_by_ids(self, query):
+        return await self._dbcog().find_monsters_by_ids(query)
+
+    def monster(self, monster):
+        return response_cache.monster(monster, self.generation())
+
+    def monsters(self, monsters):
+        return response_cache.monsters(monsters, self.generation())
+
+    def monster_with_evos(self, monster):
+        return response_cache.monster_with_evos(self._dbcog().database.graph, monster, self.generation())
+
+
+def cached_response(content: bytes, if_none_match: Optional[str]) -> Response:
+    etag = body_etag(content)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=content, media_type="application/json", headers={"ETag": etag})
+
+
+def not_found(query: Optional[str]) -> HTTPException:
+    return HTTPException(status_code=404, detail={
+        "error": "No monster found for {}".format(query),
+        "code": 404})
+
+
+def make_monster_router(backend: MonsterBackend) -> APIRouter:
+    router = APIRouter()
+    search_cache = SearchCache()
+
+    @router.get("/search")
+    async def search(q: str = Query(min_length=1),
+                     limit: int = Query(default=20, ge=1, le=100),
+                     offset: int = Query(default=0, ge=0),
+                     stream: bool = False,
+                     session: Optional[str] = None,
+                     if_none_match: Optional[str] = Header(default=None)):
+        backend.ensure_ready()
+        monsters = await search_cache.search(q, backend.generation(), backend.find_monsters, session)
+        if monsters is None:
+            # A newer search from this session replaced this one
+            return Response(status_code=204)
+
+        blobs = [blob for m in monsters[offset:offset + limit] if (blob := backend.monster(m)) is not None]
+        etag = search_etag(blobs, len(monsters), offset, limit, stream)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return search_response(blobs, len(monsters), offset, limit, stream, etag)
+
+    @router.get("/{monster_id}", response_model=MonsterResponse)
+    async def get(monster_id, if_none_match: Optional[str] = Header(default=None)):
+        backend.ensure_ready()
+        monster = await backend.find_monster(monster_id)
+        if not monster or (content := backend.monster(monster)) is None:
+            raise not_found(monster_id)
+        return cached_response(content, if_none_match)
+
+    @router.get("/get-many/", response_model=MonstersResponse)
+    async def getManyById(q: Union[str, None] = Query(default=None, min_length=1),
+                          if_none_match: Optional[str] = Header(default=None)):
+        backend.ensure_ready()
+        monsters = await backend.find_monsters_by_ids(q)
+        return cached_response(backend.monsters(monsters), if_none_match)
+
+    @router.get("/team-builder/", response_model=MonsterWithEvosResponse)
+    async def team_builder_query(q: Union[str, None] = Query(default=None, min_length=1),
+                                 if_none_match: Optional[str] = Header(default=None)):
+        backend.ensure_ready()
+        monster = await backend.find_monster(q)
+        if not monster or (content := backend.monster_with_evos(monster)) is None:
+            raise not_found(q)
+        return cached_response(content, if_none_match)
+
+    return router
+
+
+monster_router = make_monster_router(DBCogBackend())
@@ -0,0 +1,67 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+
+from api.response_cache import body_etag
+from dbcog.find_monster.query_cache import QueryCache
+
+# How long a search with a session waits for a newer search from the same session before running
+SEARCH_DEBOUNCE = .15
+
+
+class SearchCache:
+    """Ranked search results for type-ahead.
+
+    Results are cached per query and database generation, so paging through a search or retyping a query
+    doesn't search again, and identical searches that arrive at the same time share a single run.  Clients
+    that pass a session are debounced: a search is only run if no newer search arrived from that session
+    within SEARCH_DEBOUNCE, so a burst of keystrokes only searches for the last one.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 10 * 60):
+        self.results = QueryCache(maxsize, ttl)
+        self._running: Dict[Hashable, "asyncio.Task[List[Any]]"] = {}
+        self._sessions: Dict[str, int] = {}
+
+    async def _debounce(self, session: str) -> bool:
+        """Whether this is still the newest search from the session after waiting"""
+        ticket = self._sessions[session] = self._sessions.get(session, 0) + 1
+        await asyncio.sleep(SEARCH_DEBOUNCE)
+        if self._sessions.get(session) != ticket:
+            return False
+        del self._sessions[session]
+        return True
+
+    async def search(self, query: str, generation: int, run: Callable[[str], Awaitable[List[Any]]],
+                     session: Optional[str] = None) -> Optional[List[Any]]:
+        """The ranked results of a query, or None if a newer search from the same session superseded it"""
+        key = (query.strip(), generation)
+        if (results := self.results.get(key)) is not None:
+            return results
+        if session is not None and not await self._debounce(session):
+            return None
+
+        task = self._running.get(key)
+        if task is None:
+            task = self._running[key] = asyncio.create_task(run(query))
+            task.add_done_callback(lambda _: self._running.pop(key, None))
+        results = await asyncio.shield(task)
+        self.results.put(key, results)
+        return results
+
+
+def search_etag(blobs: List[bytes], total: int, offset: int, limit: int, stream: bool) -> str:
+    return body_etag(b'%d:%d:%d:%d\n' % (total, offset, limit, stream), *(blob + b'\n' for blob in blobs))
+
+
+def search_response(blobs: List[bytes], total: int, offset: int, limit: int, stream: bool, etag: str) -> Response:
+    """A page of search results as JSON, or as newline delimited JSON if streaming"""
+    headers = {"X-Total-Count": str(total), "ETag": etag}
+    if stream:
+        return StreamingResponse((blob + b'\n' for blob in blobs), media_type="application/x-ndjson",
+                                 headers=headers)
+    content = b'{"total":%d,"offset":%d,"limit":%d,"monsters":[' % (total, offset, limit) \
+              + b','.join(blobs) + b']}'
+    return Response(content=content, media_type="application/json", headers=headers)
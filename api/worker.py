@@ -0,0 +1,80 @@
+"""
+The API served from separate worker processes.
+
+Workers never touch the bot or DBCog directly.  Responses are read from the export that APICog writes after
+every database load, plain monster numbers are resolved from the same export, and only fuzzy queries are
+forwarded to the bot over the local query channel.  Heavy API traffic then can't slow down the bot itself.
+"""
+import asyncio
+import os
+import re
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+
+from api.api import build_app
+from api.export import ResponseExport
+from api.ipc import Address, QueryClient
+from api.routers.monster import MonsterBackend, make_monster_router
+
+EXPORT_PATH_ENV = 'TSUBAKI_API_EXPORT'
+QUERY_HOST_ENV = 'TSUBAKI_API_QUERY_HOST'
+QUERY_PORT_ENV = 'TSUBAKI_API_QUERY_PORT'
+QUERY_AUTHKEY_ENV = 'TSUBAKI_API_QUERY_AUTHKEY'
+
+
+class ExportBackend(MonsterBackend):
+    """Reads responses from the export and resolves fuzzy queries through the bot.  Monsters are response keys."""
+
+    def __init__(self, export: ResponseExport, client: QueryClient):
+        self.export = export
+        self.client = client
+
+    def ensure_ready(self) -> None:
+        if not self.export.refresh():
+            raise HTTPException(status_code=503, detail={"error": "Monster data is still loading", "code": 503})
+
+    def generation(self) -> int:
+        return self.export.generation
+
+    async def find_monster(self, query):
+        number = query.strip()
+        if re.fullmatch(r'[0-9]+', number) and number in self.export.numbers:
+            return self.export.numbers[number]
+        return await asyncio.get_running_loop().run_in_executor(None, self.client.find_monster, query)
+
+    async def find_monsters(self, query):
+        return await asyncio.get_running_loop().run_in_executor(None, self.client.find_monsters, query)
+
+    async def find_monsters_by_ids(self, query):
+        resolved = {}
+        for monster_id in query.split(","):
+            if monster_id not in resolved:
+                resolved[monster_id] = await self.find_monster(monster_id)
+        return [resolved[monster_id] for monster_id in query.split(",")]
+
+    def monster(self, monster):
+        return self.export.monster(monster)
+
+    def monsters(self, monsters):
+        return self.export.monsters(monsters)
+
+    def monster_with_evos(self, monster):
+        return self.export.monster_with_evos(monster)
+
+
+def create_app() -> FastAPI:
+    export = ResponseExport(os.environ[EXPORT_PATH_ENV])
+    client = QueryClient((os.environ[QUERY_HOST_ENV], int(os.environ[QUERY_PORT_ENV])),
+                         bytes.fromhex(os.environ[QUERY_AUTHKEY_ENV]))
+    return build_app(make_monster_router(ExportBackend(export, client)))
+
+
+def run_workers(export_path: str, query_address: Address, authkey: bytes, host: str, port: int,
+                workers: int) -> None:
+    """The entrypoint of the process APICog spawns.  uvicorn starts the workers from here."""
+    os.environ[EXPORT_PATH_ENV] = export_path
+    os.environ[QUERY_HOST_ENV] = query_address[0]
+    os.environ[QUERY_PORT_ENV] = str(query_address[1])
+    os.environ[QUERY_AUTHKEY_ENV] = authkey.hex()
+    uvicorn.run("api.worker:create_app", factory=True, host=host, port=port, workers=workers, log_level="info")
@@ -127,13 +127,11 @@ class EditSeries:
         elif target == 'group':
             monsters = [monster
                         for gid in re.split(r'\D+', target_str)
-                        for monster in dbcog.database.get_monsters_where(lambda m: m.group_id == int(gid),
-                                                                         server=Server.COMBINED)]
+                        for monster in dbcog.database.get_monsters_by_group(int(gid), server=Server.COMBINED)]
         elif target == 'collab':
             monsters = [monster
                         for gid in re.split(r'\D+', target_str)
-                        for monster in dbcog.database.get_monsters_where(lambda m: m.collab_id == int(gid),
-                                                                         server=Server.COMBINED)]
+                        for monster in dbcog.database.get_monsters_by_collab(int(gid), server=Server.COMBINED)]
         if not monsters:
             return await ctx.send("No matching monsters found.")
 
@@ -154,15 +152,17 @@ class EditSeries:
             if target_ids == 0:
                 return await ctx.send("You cannot propagate the unsorted series.")
             monsters = {evo
-                        for monster in dbcog.database.get_monsters_where(lambda m: m.series_id in target_ids,
-                                                                         server=Server.COMBINED)
+                        for sid in target_ids
+                        for monster in dbcog.database.get_monsters_by_series(sid, server=Server.COMBINED)
                         for evo in dbcog.database.graph.get_alt_monsters(monster)}
         elif target == "group":
-            monsters = {monster for monster in dbcog.database.get_monsters_where(lambda m: m.group_id in target_ids,
-                                                                                 server=Server.COMBINED)}
+            monsters = {monster
+                        for gid in target_ids
+                        for monster in dbcog.database.get_monsters_by_group(gid, server=Server.COMBINED)}
         elif target == "collab":
-            monsters = {monster for monster in dbcog.database.get_monsters_where(lambda m: m.collab_id in target_ids,
-                                                                                 server=Server.COMBINED)}
+            monsters = {monster
+                        for gid in target_ids
+                        for monster in dbcog.database.get_monsters_by_collab(gid, server=Server.COMBINED)}
 
         if not monsters:
             return await ctx.send("No monsters found.")
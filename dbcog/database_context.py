@@ -1,5 +1,6 @@
+from collections import defaultdict
 from functools import lru_cache
-from typing import Callable, Hashable, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 
 from tsutils.enums import Server
 
@@ -11,7 +12,10 @@ from .models.enum_types import DEFAULT_SERVER
 from .models.monster_model import MonsterModel
 from .models.scheduled_event_model import ScheduledEventModel
 from .models.series_model import SeriesModel
-from .monster_graph import MonsterGraph
+from .monster_graph import GRAPH_SERVERS, MonsterGraph
+
+# Monster attributes that get a hash index from value to monsters
+INDEXED_ATTRIBUTES = ('series_id', 'active_skill_id', 'leader_skill_id', 'group_id', 'collab_id')
 
 SCHEDULED_EVENT_QUERY = """SELECT
   schedule.*,
@@ -32,43 +36,55 @@ class DbContext:
         self.graph = graph
         self.dungeon = dungeon
 
-        self.cached_filters = {}
         self.debug_monster_ids = debug_monster_ids
 
         self.awoken_skill_map = {awsk.awoken_skill_id: awsk for awsk in self.get_all_awoken_skills()}
         self.series_map = {series.series_id: series for series in self.get_all_series()}
 
-    def get_monsters_where(self, f: Callable[[MonsterModel], bool], *, server: Server, cache_key: Hashable = None) \
-            -> List[MonsterModel]:
-        if cache_key is None:
-            return [m for m in self.get_all_monsters(server) if f(m)]
+        self._monster_indexes: Dict[Server, Dict[str, Dict[Any, Tuple[MonsterModel, ...]]]] = {}
+        for server in GRAPH_SERVERS:
+            self._monster_indexes[server] = self._build_monster_indexes(graph.get_ordered_monsters(server))
+
+    @staticmethod
+    def _build_monster_indexes(monsters: Iterable[MonsterModel]) -> Dict[str, Dict[Any, Tuple[MonsterModel, ...]]]:
+        indexes = {attribute: defaultdict(list) for attribute in INDEXED_ATTRIBUTES}
+        for m in monsters:
+            for attribute, index in indexes.items():
+                index[getattr(m, attribute)].append(m)
+        return {attribute: {value: tuple(ms) for value, ms in index.items()} for attribute, index in indexes.items()}
 
-        if (cache_key, server) in self.cached_filters:
-            return self.cached_filters[(cache_key, server)]
+    def get_monsters_where(self, f: Callable[[MonsterModel], bool], *, server: Server) -> List[MonsterModel]:
+        return [m for m in self.get_all_monsters(server) if f(m)]
 
-        self.cached_filters[(cache_key, server)] = self.get_monsters_where(f, server=server)
-        return self.cached_filters[(cache_key, server)]
+    def get_monsters_by(self, attribute: str, value: Any, *, server: Server) -> List[MonsterModel]:
+        """Monsters whose attribute (one of INDEXED_ATTRIBUTES) equals value, ordered by monster id"""
+        return list(self._monster_indexes[server][attribute].get(value, ()))
 
     def get_monsters_by_series(self, series_id: int, *, server: Server) -> List[MonsterModel]:
-        return self.get_monsters_where(lambda m: m.series_id == series_id, server=server)
+        return self.get_monsters_by('series_id', series_id, server=server)
 
     def get_monsters_by_active(self, active_skill_id: int, *, server: Server) -> List[MonsterModel]:
-        return self.get_monsters_where(lambda m: m.active_skill_id == active_skill_id, server=server)
+        return self.get_monsters_by('active_skill_id', active_skill_id, server=server)
 
     def get_monsters_by_leader(self, leader_skill_id: int, *, server: Server) -> List[MonsterModel]:
-        return self.get_monsters_where(lambda m: m.leader_skill_id == leader_skill_id, server=server)
+        return self.get_monsters_by('leader_skill_id', leader_skill_id, server=server)
+
+    def get_monsters_by_group(self, group_id: int, *, server: Server) -> List[MonsterModel]:
+        return self.get_monsters_by('group_id', group_id, server=server)
+
+    def get_monsters_by_collab(self, collab_id: int, *, server: Server) -> List[MonsterModel]:
+        return self.get_monsters_by('collab_id', collab_id, server=server)
 
     def get_all_monster_ids(self, server: Server) -> Iterable[int]:
-        # We don't need to query if we're in debug mode.  We already know exactly which monsters we're working with
-        if self.debug_monster_ids is not None:
-            return self.debug_monster_ids
+        return (m.monster_id for m in self.get_all_monsters(server))
 
-        suffix = '_na' if server == Server.NA else ''
-        query = self.database.query_many(f"SELECT monster_id FROM monsters{suffix}", as_generator=True)
-        return (m.monster_id for m in query)
+    def get_all_monsters(self, server: Server = DEFAULT_SERVER) -> Tuple[MonsterModel, ...]:
+        """Every monster on a server, ordered by monster id"""
+        return self.graph.get_ordered_monsters(server)
 
-    def get_all_monsters(self, server: Server = DEFAULT_SERVER) -> List[MonsterModel]:
-        return [self.graph.get_monster(mid, server=server) for mid in self.get_all_monster_ids(server)]
+    def get_monster_ordinals(self, server: Server = DEFAULT_SERVER) -> Mapping[int, int]:
+        """The position of each monster id in get_all_monsters, shared with the modifier indexes"""
+        return self.graph.get_monster_ordinals(server)
 
     def get_all_awoken_skills(self) -> List[AwokenSkillModel]:
         result = self.database.query_many("SELECT * FROM awoken_skills")
@@ -81,14 +97,15 @@ class DbContext:
     def get_all_events(self) -> Iterable[ScheduledEventModel]:
         result = self.database.query_many(SCHEDULED_EVENT_QUERY)
         for se in result:
-            se['dungeon_model'] = DungeonModel(name_ja=se['d_name_ja'],
-                                               name_en=se['d_name_en'],
-                                               name_ko=se['d_name_ko'],
-                                               **se)
-            yield ScheduledEventModel(**se)
+            dungeon_model = DungeonModel(name_ja=se['d_name_ja'],
+                                         name_en=se['d_name_en'],
+                                         name_ko=se['d_name_ko'],
+                                         **se)
+            yield ScheduledEventModel(dungeon_model=dungeon_model, **se)
 
     def has_database(self) -> bool:
         return self.database.has_database()
 
     def close(self) -> None:
+        self.dungeon.invalidate()
         self.database.close()
@@ -1,30 +1,83 @@
+import itertools
 import os
+import re
 import shutil
+from typing import List, Optional, Set, Tuple
 
 from redbot.core import data_manager
+from tsutils.enums import Server
 
 from .database_context import DbContext
 from .database_manager import DBCogDatabase
 from .dungeon_context import DungeonContext
 from .monster_graph import MonsterGraph
 
+_working_file_counter = itertools.count()
+
 
 def _data_file(file_name: str) -> str:
     return os.path.join(str(data_manager.cog_data_path(raw_name='dbcog')), file_name)
 
 
-def load_database(existing_db, debug_monster_ids):
-    DB_DUMP_FILE = _data_file('dadguide.sqlite')
-    DB_DUMP_WORKING_FILE = _data_file('dadguide_working.sqlite')
+def _working_file() -> str:
+    # Every load gets its own working copy, so the copy that the live database still has open is never
+    # replaced underneath it.  That isn't allowed on Windows at all.
+    return _data_file(f'dadguide_working_{os.getpid()}_{next(_working_file_counter)}.sqlite')
+
+
+def _remove_stale_working_files() -> None:
+    """Remove working copies left behind by processes that didn't shut down cleanly"""
+    pattern = re.compile(r'dadguide_working(?:_(\d+)_\d+)?\.sqlite')
+    data_dir = _data_file('')
+    for file_name in os.listdir(data_dir):
+        match = pattern.fullmatch(file_name)
+        if match and match.group(1) != str(os.getpid()):
+            try:
+                os.remove(os.path.join(data_dir, file_name))
+            except OSError:
+                pass
+
+
+def open_working_database() -> DBCogDatabase:
+    """Open a private copy of the downloaded database.  The copy is deleted when the database is closed."""
+    _remove_stale_working_files()
+    # Copy the download so we can open a handle to it without affecting future downloads
+    working_file = _working_file()
+    shutil.copy2(_data_file('dadguide.sqlite'), working_file)
+    return DBCogDatabase(data_file=working_file, read_only=True, delete_on_close=True)
+
+
+def make_db_context(database: DBCogDatabase, graph: MonsterGraph,
+                    debug_monster_ids: Optional[List[int]]) -> DbContext:
+    dungeon = DungeonContext(database)
+    # Build this now so that the first dungeon menu after a reload doesn't wait on it
+    dungeon.get_store(Server.COMBINED)
+    return DbContext(database, graph, dungeon, debug_monster_ids)
+
+
+def load_database(existing_db, debug_monster_ids, graph: Optional[MonsterGraph] = None):
     # Release the handle to the database file if it has one
     if existing_db:
         existing_db.close()
-    # Overwrite the working copy so we can open a handle to it without affecting future downloads
-    if os.path.exists(DB_DUMP_FILE):
-        shutil.copy2(DB_DUMP_FILE, DB_DUMP_WORKING_FILE)
-    # Open the new working copy.
-    database = DBCogDatabase(data_file=DB_DUMP_WORKING_FILE)
-    graph = MonsterGraph(database, debug_monster_ids)
-    dungeon = DungeonContext(database)
-    db_context = DbContext(database, graph, dungeon, debug_monster_ids)
-    return db_context
+    database = open_working_database()
+    if graph is None:
+        graph = MonsterGraph(database, debug_monster_ids)
+    else:
+        # This graph was loaded from a snapshot
+        graph.database = database
+    return make_db_context(database, graph, debug_monster_ids)
+
+
+def refresh_database(graph: MonsterGraph, database: DBCogDatabase) -> Optional[Tuple[DbContext, Set[int]]]:
+    """Refresh a graph in place from a newly opened database.
+
+    Returns the new DbContext and the ids of every monster that changed, or None if the graph has to be
+    rebuilt from scratch.  The DbContext is only built once the graph is up to date, because it indexes
+    the graph's monsters.
+    """
+    graph.database = database
+    changed_ids = graph.refresh()
+    if changed_ids is None:
+        database.close()
+        return None
+    return make_db_context(database, graph, None), set().union(*changed_ids.values())
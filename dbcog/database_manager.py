@@ -1,7 +1,13 @@
 import logging
+import os
 import sqlite3 as lite
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from queue import Empty, LifoQueue
 from sqlite3 import OperationalError
-from typing import Any, Dict, Generator, List, Optional, Tuple, Type, TypeVar, Union
+from typing import Any, Dict, Generator, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 from dbcog.errors import QueryFailure
 
@@ -9,6 +15,17 @@ logger = logging.getLogger('red.padbot-cogs.dbcog.database_manager')
 
 T = TypeVar('T')
 
+# Applied to every pooled connection.  The working copy of the database is never written to, so it's
+# memory-mapped whole and temporary b-trees for sorts and joins are kept off disk.
+CONNECTION_PRAGMAS = (
+    'PRAGMA mmap_size = 268435456',
+    'PRAGMA cache_size = -8192',
+    'PRAGMA temp_store = MEMORY',
+)
+READ_ONLY_PRAGMAS = (
+    'PRAGMA query_only = ON',
+)
+
 
 class DictWithAttrAccess(Dict[str, T]):
     def __init__(self, item: Optional[Dict[str, T]] = None, **items):
@@ -18,22 +35,113 @@ class DictWithAttrAccess(Dict[str, T]):
         self.__dict__ = self
 
 
+class Row(Mapping):
+    """A read-only database row that supports both key and attribute access.
+
+    Rows from the same query share a single column to index map, so each row only stores a tuple of its
+    values instead of a dict of its own.
+    """
+    __slots__ = ('_columns', '_values')
+
+    def __init__(self, columns: Dict[str, int], values: Sequence[Any]):
+        self._columns = columns
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._columns[key]]
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[self._columns[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __repr__(self) -> str:
+        return 'Row({!r})'.format(dict(self.items()))
+
+    def __getstate__(self):
+        return self._columns, self._values
+
+    def __setstate__(self, state):
+        self._columns, self._values = state
+
+
+def _columns(cursor: lite.Cursor) -> Dict[str, int]:
+    # Later columns win, just like they would when building a dict from the row
+    return {description[0]: c for c, description in enumerate(cursor.description or ())}
+
+
 class DBCogDatabase:
-    def __init__(self, data_file: str):
-        self._con = lite.connect(data_file, detect_types=lite.PARSE_DECLTYPES)
-        self._con.row_factory = lite.Row
+    """A pool of connections to a database file that can be shared between threads.
+
+    Connections are opened lazily, up to pool_size of them, so queries from executor threads don't
+    have to wait on each other or on the event loop.  Read-only databases are opened as immutable,
+    which lets SQLite skip locking entirely.
+    """
+
+    def __init__(self, data_file: str, read_only: bool = False, pool_size: int = 4, delete_on_close: bool = False):
+        self.data_file = data_file
+        self.read_only = read_only
+        self.delete_on_close = delete_on_close
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._connections: List[lite.Connection] = []
+        self._idle: "LifoQueue[lite.Connection]" = LifoQueue()
+        self._closed = False
+        # Open one connection up front so that a bad file fails here instead of on the first query
+        self._idle.put(self._connect())
 
     def __del__(self):
         self.close()
         logger.info("Garbage Collecting Old Database")
 
+    def _connect(self) -> lite.Connection:
+        if self.read_only:
+            con = lite.connect(Path(self.data_file).resolve().as_uri() + '?mode=ro&immutable=1', uri=True,
+                               detect_types=lite.PARSE_DECLTYPES, check_same_thread=False)
+        else:
+            con = lite.connect(self.data_file, detect_types=lite.PARSE_DECLTYPES, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS + (READ_ONLY_PRAGMAS if self.read_only else ()):
+            con.execute(pragma)
+        self._connections.append(con)
+        return con
+
+    @contextmanager
+    def _connection(self) -> Iterator[lite.Connection]:
+        try:
+            con = self._idle.get_nowait()
+        except Empty:
+            with self._lock:
+                con = self._connect() if len(self._connections) < self.pool_size else None
+            if con is None:
+                con = self._idle.get()
+        try:
+            yield con
+        finally:
+            self._idle.put(con)
+
     def has_database(self) -> bool:
-        return self._con is not None
+        return not self._closed
 
     def close(self) -> None:
-        if self._con:
-            self._con.close()
-        self._con = None
+        if getattr(self, '_closed', True):
+            return
+        self._closed = True
+        with self._lock:
+            for con in self._connections:
+                con.close()
+            self._connections.clear()
+        if self.delete_on_close:
+            try:
+                os.remove(self.data_file)
+            except OSError:
+                logger.warning(f"Failed to remove database file {self.data_file}")
 
     @staticmethod
     def select_builder(tables, key: Optional[str] = None, where: Optional[str] = None,
@@ -69,40 +177,66 @@ class DBCogDatabase:
             query.append(ORDER.format(order=order))
         return ' '.join(query)
 
-    def query_one(self, query: str, param: Tuple = None) -> Optional[DictWithAttrAccess]:
+    def query_one(self, query: str, param: Tuple = None) -> Optional[Row]:
         if param is None:
             param = ()
 
-        cursor = self._con.cursor()
-        try:
-            cursor.execute(query, param)
-        except OperationalError:
-            raise QueryFailure
-        res = cursor.fetchone()
-        if res is not None:
-            return DictWithAttrAccess(res)
+        with self._connection() as con:
+            try:
+                cursor = con.execute(query, param)
+            except OperationalError:
+                raise QueryFailure
+            res = cursor.fetchone()
+            if res is not None:
+                return Row(_columns(cursor), res)
         return None
 
     def query_many(self, query: str, param: Tuple = None, idx_key: Optional[str] = None,
-                   as_generator: bool = False, as_type: Type[T] = DictWithAttrAccess) \
+                   as_generator: bool = False, as_type: Optional[Type[T]] = None) \
             -> Union[Generator[T, None, None],
                      List[T],
                      Dict[Any, T]]:
+        """Run a query and return all of its rows.
+
+        Rows are returned as Row unless as_type is given, in which case each row is passed to it as keyword
+        arguments.
+        """
         if param is None:
             param = ()
 
-        cursor = self._con.cursor()
-        try:
-            cursor.execute(query, param)
-        except OperationalError:
-            raise QueryFailure
+        with self._connection() as con:
+            try:
+                cursor = con.execute(query, param)
+            except OperationalError:
+                raise QueryFailure
+            columns = _columns(cursor)
+            results = [Row(columns, res) for res in cursor.fetchall()]
 
-        if cursor.rowcount == 0:
-            return []
+        if as_type is not None:
+            results = [as_type(**res) for res in results]
         if as_generator:
-            return (as_type(**res) for res in cursor.fetchall())
+            return (res for res in results)
         else:
             if idx_key is None:
-                return [as_type(**res) for res in cursor.fetchall()]
+                return results
             else:
-                return {res[idx_key]: as_type(**res) for res in cursor.fetchall()}
+                return {res[idx_key]: res for res in results}
+
+    def iter_query(self, query: str, param: Tuple = None, batch_size: int = 256) -> Generator[Row, None, None]:
+        """Stream the rows of a query instead of fetching them all at once.
+
+        The connection stays checked out of the pool until the generator is exhausted or closed, so don't
+        leave one half consumed.
+        """
+        if param is None:
+            param = ()
+
+        with self._connection() as con:
+            try:
+                cursor = con.execute(query, param)
+            except OperationalError:
+                raise QueryFailure
+            columns = _columns(cursor)
+            while batch := cursor.fetchmany(batch_size):
+                for res in batch:
+                    yield Row(columns, res)
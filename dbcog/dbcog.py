@@ -26,14 +26,20 @@ from tsutils.user_interaction import StatusManager, send_confirmation_message
 
 from .find_monster import token_mappings
 from .database_context import DbContext
-from .database_loader import load_database
+from .database_loader import load_database, open_working_database, refresh_database
+from .loop_monitor import LoopBlockMonitor
+from .memory_stats import deep_sizeof, rss_bytes
 from dbcog.find_monster.find_monster import FindMonster, MonsterInfo
 from .find_monster.extra_info import ExtraInfo
+from .find_monster.query_cache import QueryCache
 from dbcog.find_monster.idtest_mixin import IdTest
 from .models.enum_types import DEFAULT_SERVER, SERVERS
 from .models.monster_model import MonsterModel
 from .models.monster_stats import MonsterStatModifierInput, monster_stats
-from .monster_index import MonsterIndex
+from .monster_graph import MonsterGraph
+from .monster_index import MonsterIndex, download_index_sheets
+from .snapshot import SnapshotKey, hash_sheets, make_snapshot_key, read_snapshot, snapshot_expired, \
+    write_snapshot
 from dbcog.find_monster.token_mappings import MONSTER_ATTR_ALIAS_TO_ATTR_MAP, MONSTER_CLASS_ATTRIBUTES, AWOKEN_SKILL_MAP, \
     KNOWN_AWOKEN_SKILL_TOKENS
 
@@ -74,6 +80,10 @@ class DBCog(commands.Cog, IdTest):
         self.config.register_user(lastaction=None, fm_flags={})
 
         self.db_file_path = _data_file('dadguide.sqlite')
+        self.snapshot_file_path = _data_file('dbcog_snapshot.pickle')
+        self.snapshot_key: Optional[SnapshotKey] = None
+        self.snapshot_created: float = 0
+        self.last_refresh_stats: Dict[str, float] = {}
         self.monster_stats = monster_stats
         self.MonsterStatModifierInput = MonsterStatModifierInput
 
@@ -86,6 +96,8 @@ class DBCog(commands.Cog, IdTest):
         self.KNOWN_AWOKEN_SKILL_TOKENS = KNOWN_AWOKEN_SKILL_TOKENS
 
         self.mon_finder = None  # type: Optional[FindMonster]
+        self.query_cache = QueryCache()
+        self.index_generation = 0
 
         gadmin: Any = self.bot.get_cog("GlobalAdmin")
         if gadmin:
@@ -141,7 +153,7 @@ class DBCog(commands.Cog, IdTest):
             start = time.perf_counter()
             await ctx.send('Starting reload...')
             await self.wait_until_ready()
-            await self.download_and_refresh_nicknames()
+            await self.download_and_refresh_nicknames(force=True)
             await ctx.send('Reload finished in {} seconds.'.format(round(time.perf_counter() - start, 2)))
 
     @commands.command(aliases=['fir3'])
@@ -157,21 +169,103 @@ class DBCog(commands.Cog, IdTest):
             await self.create_index()
             await ctx.send('Reload finished in {} seconds.'.format(round(time.perf_counter() - start, 2)))
 
-    async def create_index(self):
+    async def create_index(self, sheets: Optional[Dict[str, str]] = None):
         """Exported function that allows a client cog to create an id3 monster index"""
-        for server in SERVERS:
-            await self.indexes[server].reset(self.database.graph)
-
+        if sheets is None:
+            sheets = await download_index_sheets()
+        self.swap_data(self.database, await self.build_indexes(self.database.graph, sheets))
+        await self.save_snapshot(sheets)
+
+    async def build_indexes(self, graph: MonsterGraph, sheets: Dict[str, str]) -> Dict[Server, MonsterIndex]:
+        """Build a fresh set of indexes in an executor without touching the ones currently in use"""
+        indexes = {server: MonsterIndex(server) for server in self.indexes}
+
+        def build():
+            for index in indexes.values():
+                index.build(graph, sheets)
+
+        await asyncio.get_running_loop().run_in_executor(None, build)
+        for index in indexes.values():
+            index.is_ready.set()
+        return indexes
+
+    def swap_data(self, database: DbContext, indexes: Dict[Server, MonsterIndex]) -> None:
+        """Atomically replace the database and indexes used for lookups with fully built ones"""
+        old_database, old_indexes = self.database, self.indexes
+        self.database, self.indexes = database, indexes
+        self.index_generation += 1
+        self.query_cache.clear()
         self.mon_finder = FindMonster(self, self.fm_flags_default)
-        asyncio.create_task(self.check_index())
+        self._is_ready.set()
 
-    async def load_old_index(self):
-        data = b'\x80\x04}\x94.'
-        for server in SERVERS:
-            self.indexes[server] = MonsterIndex.deserialize(data, server, self.database.graph)
+        # Anything still waiting on the old indexes will pick up the new ones from get_index
+        for index in old_indexes.values():
+            index.is_ready.set()
+        if old_database is not None and old_database is not database:
+            old_database.close()
+        asyncio.create_task(self.check_index_when_ready(self.index_generation))
+        self.bot.dispatch('dbcog_reload', self.index_generation)
+
+    async def check_index_when_ready(self, generation: int) -> None:
+        """Check the swapped in data once the bot can send the results"""
+        # Snapshots are swapped in at startup, before the bot has connected
+        await self.bot.wait_until_ready()
+        if generation == self.index_generation:
+            await self.check_index()
+        # Otherwise newer data was swapped in while we waited, and that swap checks it
 
-        self.mon_finder = FindMonster(self, self.fm_flags_default)
-        asyncio.create_task(self.check_index())
+    async def get_snapshot_key(self, db_file_path: str, sheets: Dict[str, str]) -> SnapshotKey:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, make_snapshot_key, db_file_path, sheets, await self.get_debug_monsters())
+
+    def snapshot_is_current(self, key: SnapshotKey) -> bool:
+        return key == self.snapshot_key and not snapshot_expired(self.snapshot_created)
+
+    async def save_snapshot(self, sheets: Dict[str, str]) -> None:
+        try:
+            key = await self.get_snapshot_key(self.database.database.data_file, sheets)
+            await asyncio.get_running_loop().run_in_executor(None, write_snapshot, self.snapshot_file_path, key,
+                                                             self.database.graph, self.indexes)
+        except Exception:
+            logger.exception("Failed to write DBCog snapshot")
+            return
+        self.snapshot_key = key
+        self.snapshot_created = time.time()
+        logger.info('Wrote DBCog snapshot')
+
+    async def load_snapshot(self) -> bool:
+        """Load the graph and indexes from the last snapshot, if it was built from the stored database and
+        the current index sheets"""
+        if not os.path.exists(self.db_file_path):
+            return False
+        try:
+            snapshot = await asyncio.get_running_loop().run_in_executor(None, read_snapshot,
+                                                                        self.snapshot_file_path)
+        except Exception:
+            logger.exception("Failed to read DBCog snapshot")
+            return False
+        if snapshot is None:
+            return False
+
+        try:
+            sheets = await download_index_sheets()
+        except Exception:
+            logger.exception("Failed to download index sheets to check the DBCog snapshot")
+            return False
+        if snapshot.key != await self.get_snapshot_key(self.db_file_path, sheets):
+            logger.info('Ignoring DBCog snapshot built from different inputs')
+            return False
+
+        database = await asyncio.get_running_loop().run_in_executor(None, load_database, None,
+                                                                    await self.get_debug_monsters(),
+                                                                    snapshot.graph)
+        self.snapshot_key = snapshot.key
+        self.snapshot_created = snapshot.created
+        for index in snapshot.indexes.values():
+            index.set_ready()
+        self.swap_data(database, snapshot.indexes)
+        logger.info('Loaded DBCog snapshot')
+        return True
 
     async def check_index(self):
         issues = []
@@ -221,6 +315,9 @@ class DBCog(commands.Cog, IdTest):
         self._is_ready.clear()
 
     async def reload_data_task(self):
+        # Serve queries from the last snapshot while we wait for the bot and check for new data
+        await self.load_snapshot()
+
         await self.bot.wait_until_ready()
 
         # We already had a copy of the database at startup, signal that we're ready now.
@@ -244,7 +341,7 @@ class DBCog(commands.Cog, IdTest):
                 logger.exception("DBCog data wait loop failed: %s", ex)
                 raise
 
-    async def download_and_refresh_nicknames(self):
+    async def download_and_refresh_nicknames(self, force: bool = False):
         if await self.config.datafile():
             logger.info('Copying database file')
             shutil.copy2(await self.config.datafile(), self.db_file_path)
@@ -254,13 +351,71 @@ class DBCog(commands.Cog, IdTest):
                                                 CLOUDFRONT_URL + '/db/dadguide.sqlite',
                                                 1 * 60 * 60)
 
-        logger.info('Loading database')
-        self.database = load_database(self.database, await self.get_debug_monsters())
-        logger.info('Building monster index, triggering ready')
-        self._is_ready.set()
-        await self.create_index()
+        sheets = await download_index_sheets()
+        if not force and self.snapshot_is_current(await self.get_snapshot_key(self.db_file_path, sheets)):
+            logger.info('Database and index sheets are unchanged, keeping current data')
+            return
+
+        async with LoopBlockMonitor() as monitor:
+            if force or not await self.refresh_incrementally(sheets):
+                await self.rebuild(sheets)
 
-        logger.info('Done refreshing database')
+        self.last_refresh_stats = {
+            'elapsed': monitor.elapsed,
+            'blocked': monitor.total_blocked,
+            'longest_block': monitor.longest_block,
+        }
+        logger.info(f'Done refreshing database in {monitor.elapsed:.2f}s.  The event loop was blocked for'
+                    f' {monitor.total_blocked:.2f}s total and {monitor.longest_block:.2f}s at most.')
+
+    async def rebuild(self, sheets: Dict[str, str]):
+        """Build a new database, graph, and indexes from scratch and swap them in"""
+        logger.info('Loading database')
+        database = await asyncio.get_running_loop().run_in_executor(None, load_database, None,
+                                                                    await self.get_debug_monsters())
+        logger.info('Building monster index')
+        indexes = await self.build_indexes(database.graph, sheets)
+        logger.info('Swapping in new data, triggering ready')
+        self.swap_data(database, indexes)
+        await self.save_snapshot(sheets)
+
+    async def refresh_incrementally(self, sheets: Dict[str, str]) -> bool:
+        """Patch the current graph and indexes with only the monsters that changed.
+
+        Returns False if a full rebuild is needed instead.  Time-dependent modifiers (new, current
+        exchanges) are only recalculated on full rebuilds, so those still happen once a day.
+        """
+        if self.database is None or self.snapshot_key is None \
+                or self.snapshot_key.sheets_hash != hash_sheets(sheets) \
+                or snapshot_expired(self.snapshot_created) \
+                or await self.get_debug_monsters() is not None:
+            return False
+
+        old_graph, old_indexes = self.database.graph, self.indexes
+
+        def refresh():
+            # Copying the graphs and indexes takes a while, so it happens here rather than on the event loop
+            logger.info('Loading database into a copy of the existing graph')
+            graph = old_graph.copy()
+            refreshed = refresh_database(graph, open_working_database())
+            if refreshed is None:
+                return None
+            database, changed_ids = refreshed
+            logger.info(f'Updating monster index for {len(changed_ids)} changed monsters')
+            indexes = {server: index.copy() for server, index in old_indexes.items()}
+            for index in indexes.values():
+                index.update(graph, changed_ids, sheets)
+            return database, indexes
+
+        refreshed = await asyncio.get_running_loop().run_in_executor(None, refresh)
+        if refreshed is None:
+            return False
+        database, indexes = refreshed
+        for index in indexes.values():
+            index.set_ready()
+        self.swap_data(database, indexes)
+        await self.save_snapshot(sheets)
+        return True
 
     @commands.group()
     @checks.is_owner()
@@ -280,6 +435,46 @@ class DBCog(commands.Cog, IdTest):
         await self.config.indexlog.set(channel.id)
         await ctx.tick()
 
+    @dbcog.command()
+    @checks.is_owner()
+    async def querycache(self, ctx, clear: bool = False):
+        """Show query cache statistics, and optionally clear the cache"""
+        cache = self.query_cache
+        total = cache.hits + cache.misses
+        await ctx.send(box(f"Entries:    {len(cache)}/{cache.maxsize}\n"
+                           f"Hits:       {cache.hits}\n"
+                           f"Misses:     {cache.misses}\n"
+                           f"Hit rate:   {cache.hits / total if total else 0:.1%}\n"
+                           f"Generation: {self.index_generation}"))
+        if clear:
+            cache.clear()
+            await ctx.tick()
+
+    @dbcog.command()
+    @checks.is_owner()
+    async def refreshstats(self, ctx):
+        """Show how long the last data refresh took and how long it blocked the bot"""
+        if not self.last_refresh_stats:
+            return await ctx.send("There hasn't been a refresh since the cog was loaded.")
+        await ctx.send(box(f"Elapsed:       {self.last_refresh_stats['elapsed']:.2f}s\n"
+                           f"Loop blocked:  {self.last_refresh_stats['blocked']:.2f}s\n"
+                           f"Longest block: {self.last_refresh_stats['longest_block']:.2f}s"))
+
+    @dbcog.command()
+    @checks.is_owner()
+    async def memory(self, ctx):
+        """Show the memory used by the process and by the loaded monster models"""
+        rss = rss_bytes()
+        graph = self.database.graph
+        monsters = [m for server in graph.graph_dict for m in graph.get_all_monsters(server)]
+        sizes = await asyncio.get_running_loop().run_in_executor(None, deep_sizeof, monsters, [graph])
+        top = sorted(sizes.items(), key=lambda kv: kv[1], reverse=True)[:10]
+        rss_text = f"{rss / 2 ** 20:.1f} MiB" if rss is not None else "unknown"
+        await ctx.send(box(f"Process RSS:    {rss_text}\n"
+                           f"Monster models: {len(monsters)} ({sum(sizes.values()) / 2 ** 20:.1f} MiB)\n\n"
+                           + tabulate([(name, f"{size / 2 ** 20:.2f} MiB") for name, size in top],
+                                      headers=["Type", "Size"])))
+
     @dbcog.group(aliases=["debug"])
     @checks.is_owner()
     async def debugmode(self, ctx):
@@ -344,6 +539,20 @@ class DBCog(commands.Cog, IdTest):
         monster, e_info = await FindMonster(self, await self.get_fm_flags(author_id)).find_monster(query)
         return monster
 
+    async def find_monsters_by_ids(self, query: str, author_id: int = 0) -> List[Optional[MonsterModel]]:
+        """Resolve a comma separated list of monster numbers, in order.
+
+        Plain numbers skip the full search.  Anything else in the list is looked up like a normal query.
+        """
+        finder = FindMonster(self, await self.get_fm_flags(author_id))
+        resolved = {}
+        monsters = []
+        for monster_id in query.split(","):
+            if monster_id not in resolved:
+                resolved[monster_id], _ = await finder.find_monster(monster_id)
+            monsters.append(resolved[monster_id])
+        return monsters
+
     async def find_monsters(self, query: str, author_id: int = 0) -> Tuple[List[MonsterModel], ExtraInfo]:
         monsters, e_info = await FindMonster(self, await self.get_fm_flags(author_id)).find_monsters(query)
         return monsters, e_info
@@ -1,10 +1,12 @@
+import threading
 from collections import defaultdict
-from functools import lru_cache
-from typing import Dict, Iterable, List, Mapping, Optional, Set
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, TypeVar
 
 from tsutils.enums import Server
 
 from dbcog.database_manager import DBCogDatabase
+from dbcog.dungeon_store import DungeonStore
+from dbcog.find_monster.query_cache import QueryCache
 from dbcog.models.dungeon_model import DungeonModel
 from dbcog.models.encounter_model import EncounterModel
 from dbcog.models.enemy_data_model import EnemyDataModel
@@ -13,6 +15,11 @@ from dbcog.models.enum_types import DEFAULT_SERVER
 from dbcog.models.monster_model import MonsterModel
 from dbcog.models.sub_dungeon_model import SubDungeonModel
 
+T = TypeVar('T')
+
+# How many drop lookups each DungeonContext remembers
+DROP_CACHE_SIZE = 1024
+
 
 def format_with_suffix(text: str, server: Server) -> str:
     suffix_map = {
@@ -24,6 +31,7 @@ def format_with_suffix(text: str, server: Server) -> str:
 
 NICKNAME_QUERY = '''
 SELECT
+    enemy_data{0}.enemy_id AS data_enemy_id,
     enemy_data{0}.behavior,
     encounters.encounter_id,
     encounters.dungeon_id,
@@ -68,8 +76,9 @@ SELECT
     sub_dungeons{0}.technical
 FROM
     sub_dungeons{0}
+    JOIN dungeons{0} ON sub_dungeons{0}.dungeon_id = dungeons{0}.dungeon_id
 WHERE
-    sub_dungeons{0}.dungeon_id = ?
+    dungeons{0}.name_en LIKE ?
 '''
 
 DUNGEON_QUERY = '''
@@ -135,44 +144,19 @@ SELECT
     encounters.level,
     encounters.hp,
     encounters.atk,
-    encounters.defense
+    encounters.defense,
+    enemy_data{0}.enemy_id AS data_enemy_id,
+    enemy_data{0}.behavior
 FROM
     encounters
+    JOIN sub_dungeons{0} ON encounters.sub_dungeon_id = sub_dungeons{0}.sub_dungeon_id
+    JOIN dungeons{0} ON sub_dungeons{0}.dungeon_id = dungeons{0}.dungeon_id
+    LEFT OUTER JOIN enemy_data{0} ON encounters.enemy_id = enemy_data{0}.enemy_id
 WHERE
-    encounters.sub_dungeon_id = ?
+    dungeons{0}.name_en LIKE ?
 ORDER BY
-    encounters.stage
-'''
-
-SPECIFIC_FLOOR_QUERY = '''
-SELECT
-    encounters.encounter_id,
     encounters.sub_dungeon_id,
-    encounters.enemy_id,
-    encounters.monster_id,
-    encounters.stage,
-    encounters.amount,
-    encounters.turns,
-    encounters.level,
-    encounters.hp,
-    encounters.atk,
-    encounters.defense
-FROM
-    encounters
-WHERE
-    encounters.sub_dungeon_id = ?
-AND
-    encounters.stage = ?
-'''
-
-ENEMY_DATA_QUERY = '''
-SELECT
-    enemy_data{0}.enemy_id,
-    enemy_data{0}.behavior
-FROM
-    enemy_data{0}
-WHERE
-    enemy_data{0}.enemy_id = ?
+    encounters.stage
 '''
 
 MONSTER_DROP_QUERY = '''
@@ -244,52 +228,90 @@ DUNGEON_NICKNAMES = {
 }
 
 
+class DungeonCache:
+    """Lookups built from one generation of the database.
+
+    The whole-table lookups are small and only one exists per server, so they're kept until the cache is
+    invalidated.  Per-key lookups go through a bounded LRU.  Invalidating starts a new generation, and a
+    result that was still being built when that happened is thrown away instead of being stored.
+    """
+
+    def __init__(self, maxsize: int = DROP_CACHE_SIZE):
+        self.generation = 0
+        self._tables: Dict[Hashable, Any] = {}
+        self._lookups = QueryCache(maxsize, ttl=float('inf'))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tables) + len(self._lookups)
+
+    def get_table(self, key: Hashable, build: Callable[[], T]) -> T:
+        return self._get(self._tables, key, build)
+
+    def get_lookup(self, key: Hashable, build: Callable[[], T]) -> T:
+        return self._get(self._lookups, key, build)
+
+    def _get(self, store, key: Hashable, build: Callable[[], T]) -> T:
+        with self._lock:
+            generation = self.generation
+            value = store.get(key)
+        if value is not None:
+            return value
+        value = build()
+        with self._lock:
+            if generation == self.generation:
+                if store is self._tables:
+                    store[key] = value
+                else:
+                    store.put(key, value)
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._tables.clear()
+            self._lookups.clear()
+
+
 class DungeonContext(object):
     def __init__(self, database: DBCogDatabase):
-        self._enemy_data_map: Dict[Server, Dict[int, EnemyDataModel]] = {}
-        self._encounter_map: Dict[Server, Dict[int, EncounterModel]] = {}
-        self._encounters_by_sub_dungeon_id: Dict[Server, Mapping[int, Set[EncounterModel]]] = {}
-        self._sub_dungeon_map: Dict[Server, Dict[int, SubDungeonModel]] = {}
-        self._sub_dungeons_by_dungeon_id: Dict[Server, Mapping[int, Set[SubDungeonModel]]] = {}
-        self._dungeon_map: Dict[Server, Dict[int, DungeonModel]] = {}
-
         self.database = database
+        self.cache = DungeonCache()
+
+    def invalidate(self) -> None:
+        """Drop every cached model.  Called when the database this was built from is replaced."""
+        self.cache.invalidate()
+
+    @staticmethod
+    def _encounter_from_row(row) -> EncounterModel:
+        """An encounter from a row that was joined with its enemy data as data_enemy_id and behavior"""
+        if row['data_enemy_id'] is not None:
+            edm = EnemyDataModel(enemy_id=row['data_enemy_id'], behavior=row['behavior'])
+        else:
+            edm = None
+        return EncounterModel(edm, **row)
 
     def get_dungeons_from_name(self, name: str, *, server: Server) -> List[DungeonModel]:
-        dungeons_result = self.database.query_many(format_with_suffix(DUNGEON_QUERY, server), (name + "%",))
-        dungeons = []
-        for d in dungeons_result:
-            dungeons.append(DungeonModel([], **d))
-
-        for dm in dungeons:
-            subs = self.database.query_many(format_with_suffix(SUB_DUNGEON_QUERY, server), (dm.dungeon_id,))
-            for s in subs:
-                encounters = self.database.query_many(format_with_suffix(ENCOUNTER_QUERY, server),
-                                                      (s['sub_dungeon_id'],))
-                ems = []
-                for e in encounters:
-                    data = self.database.query_one(format_with_suffix(ENEMY_DATA_QUERY, server), (e["enemy_id"],))
-                    if data is not None:
-                        edm = EnemyDataModel(**data)
-                    else:
-                        edm = None
-                    ems.append(EncounterModel(edm, **e))
-                dm.sub_dungeons.append(SubDungeonModel(ems, **s))
-        return dungeons
+        # The dungeons, their sub dungeons, and all of their encounters are fetched in one query each
+        pattern = (name + "%",)
+        dungeons_result = self.database.query_many(format_with_suffix(DUNGEON_QUERY, server), pattern)
+        subs_result = self.database.query_many(format_with_suffix(SUB_DUNGEON_QUERY, server), pattern)
+        encounters_result = self.database.query_many(format_with_suffix(ENCOUNTER_QUERY, server), pattern)
+
+        encounters_by_sub_id = defaultdict(list)
+        for e in encounters_result:
+            encounters_by_sub_id[e['sub_dungeon_id']].append(self._encounter_from_row(e))
+        subs_by_dungeon_id = defaultdict(list)
+        for s in subs_result:
+            subs_by_dungeon_id[s['dungeon_id']].append(SubDungeonModel(encounters_by_sub_id[s['sub_dungeon_id']], **s))
+        return [DungeonModel(subs_by_dungeon_id[d['dungeon_id']], **d) for d in dungeons_result]
 
     def get_dungeons_from_nickname(self, name: str, *, server: Server) -> List[DungeonModel]:
         if name not in DUNGEON_NICKNAMES:
             return []
         sub_id = DUNGEON_NICKNAMES.get(name)
         mega = self.database.query_many(format_with_suffix(NICKNAME_QUERY, server), (sub_id,))
-        ems = []
-        for enc in mega:
-            data = self.database.query_one(format_with_suffix(ENEMY_DATA_QUERY, server), (enc["enemy_id"],))
-            if data is not None:
-                edm = EnemyDataModel(**data)
-            else:
-                edm = None
-            ems.append(EncounterModel(edm, **enc))
+        ems = [self._encounter_from_row(enc) for enc in mega]
         sm = SubDungeonModel(ems,
                              sub_dungeon_id=mega[0]['sub_dungeon_id'],
                              dungeon_id=mega[0]['dungeon_id'],
@@ -299,19 +321,12 @@ class DungeonContext(object):
                              technical=mega[0]['technical'])
         return [DungeonModel([sm], **mega[0])]
 
+    def get_store(self, server: Server = DEFAULT_SERVER) -> DungeonStore:
+        """All of a server's encounters, built on first use and kept until the cache is invalidated"""
+        return self.cache.get_table(('store', server), lambda: DungeonStore.build(self.database, server))
+
     def get_floor_from_sub_dungeon(self, sub_id: int, floor: int, *, server: Server) -> List[EncounterModel]:
-        floor_query = self.database.query_many(format_with_suffix(SPECIFIC_FLOOR_QUERY, server), (sub_id, floor))
-        invade_query = self.database.query_many(format_with_suffix(SPECIFIC_FLOOR_QUERY, server), (sub_id, -1))
-        encounter_models = []
-        floor_query.extend(invade_query)
-        for f in floor_query:
-            data = self.database.query_one(format_with_suffix(ENEMY_DATA_QUERY, server), (f['enemy_id'],))
-            if data is not None:
-                edm = EnemyDataModel(**data)
-            else:
-                edm = None
-            encounter_models.append(EncounterModel(edm, **f))
-        return encounter_models
+        return self.get_store(server).get_floor(sub_id, floor)
 
     def get_enemy_skill(self, enemy_skill_id: int, *, server: Server) -> EnemySkillModel:
         enemy_skill_query = self.database.query_one(format_with_suffix(ES_QUERY, server), (enemy_skill_id,))
@@ -342,8 +357,10 @@ class DungeonContext(object):
             return 1
         return sub_dungeons[0]['sub_dungeon_id']
 
-    @lru_cache(maxsize=None)
     def get_all_enemy_data(self, *, server: Server = DEFAULT_SERVER) -> List[EnemyDataModel]:
+        return self.cache.get_table(('enemy_data', server), lambda: self._load_enemy_data(server))
+
+    def _load_enemy_data(self, server: Server) -> List[EnemyDataModel]:
         suffix = ""
         if server == Server.NA:
             pass
@@ -354,12 +371,15 @@ class DungeonContext(object):
         return [EnemyDataModel(**r) for r in result]
 
     def get_enemy_data(self, enemy_id: int, *, server: Server = DEFAULT_SERVER) -> Optional[EnemyDataModel]:
-        if server not in self._enemy_data_map:
-            self._enemy_data_map[server] = {ed.enemy_id: ed for ed in self.get_all_enemy_data(server=server)}
-        return self._enemy_data_map[server].get(enemy_id)
+        enemy_data_map = self.cache.get_table(
+            ('enemy_data_map', server),
+            lambda: {ed.enemy_id: ed for ed in self.get_all_enemy_data(server=server)})
+        return enemy_data_map.get(enemy_id)
 
-    @lru_cache(maxsize=None)
     def get_all_encounters(self, server: Server = DEFAULT_SERVER) -> List[EncounterModel]:
+        return self.cache.get_table(('encounters', server), lambda: self._load_encounters(server))
+
+    def _load_encounters(self, server: Server) -> List[EncounterModel]:
         suffix = ""
         if server == Server.NA:
             pass
@@ -370,60 +390,70 @@ class DungeonContext(object):
         return [EncounterModel(self.get_enemy_data(r.enemy_id), **r) for r in result]
 
     def get_encounter(self, encounter_id: int, *, server: Server = DEFAULT_SERVER) -> Optional[EncounterModel]:
-        if server not in self._encounter_map:
-            self._encounter_map[server] = {e.encounter_id: e for e in self.get_all_encounters(server=server)}
-        return self._encounter_map[server].get(encounter_id)
+        encounter_map = self.cache.get_table(
+            ('encounter_map', server),
+            lambda: {e.encounter_id: e for e in self.get_all_encounters(server=server)})
+        return encounter_map.get(encounter_id)
 
-    @lru_cache(maxsize=None)
     def get_all_sub_dungeons(self, server: Server = DEFAULT_SERVER) -> List[SubDungeonModel]:
-        if server not in self._encounters_by_sub_dungeon_id:
-            self._encounters_by_sub_dungeon_id[server] = defaultdict(set)
-            for encounter in self.get_all_encounters(server=server):
-                self._encounters_by_sub_dungeon_id[server][encounter.sub_dungeon_id].add(encounter)
+        return self.cache.get_table(('sub_dungeons', server), lambda: self._load_sub_dungeons(server))
+
+    def _load_sub_dungeons(self, server: Server) -> List[SubDungeonModel]:
+        encounters_by_sub_dungeon_id = defaultdict(set)
+        for encounter in self.get_all_encounters(server=server):
+            encounters_by_sub_dungeon_id[encounter.sub_dungeon_id].add(encounter)
 
         suffix = ""
         if server == Server.NA:
             suffix = '_na'
 
         result = self.database.query_many(f"SELECT * FROM sub_dungeons{suffix}")
-        return [SubDungeonModel(sorted(self._encounters_by_sub_dungeon_id[server][r.sub_dungeon_id],
+        return [SubDungeonModel(sorted(encounters_by_sub_dungeon_id[r.sub_dungeon_id],
                                        key=lambda e: e.encounter_id),
                                 **r) for r in result]
 
     def get_sub_dungeon(self, sub_dungeon_id: int, *, server: Server = DEFAULT_SERVER) -> Optional[SubDungeonModel]:
-        if server not in self._sub_dungeon_map:
-            self._sub_dungeon_map[server] = {e.sub_dungeon_id: e for e in self.get_all_sub_dungeons(server=server)}
-        return self._sub_dungeon_map[server].get(sub_dungeon_id)
+        sub_dungeon_map = self.cache.get_table(
+            ('sub_dungeon_map', server),
+            lambda: {e.sub_dungeon_id: e for e in self.get_all_sub_dungeons(server=server)})
+        return sub_dungeon_map.get(sub_dungeon_id)
 
-    @lru_cache(maxsize=None)
     def get_all_dungeons(self, server: Server = DEFAULT_SERVER) -> List[DungeonModel]:
-        if server not in self._sub_dungeons_by_dungeon_id:
-            self._sub_dungeons_by_dungeon_id[server] = defaultdict(set)
-            for sub_dungeon in self.get_all_sub_dungeons(server=server):
-                self._sub_dungeons_by_dungeon_id[server][sub_dungeon.dungeon_id].add(sub_dungeon)
+        return self.cache.get_table(('dungeons', server), lambda: self._load_dungeons(server))
+
+    def _load_dungeons(self, server: Server) -> List[DungeonModel]:
+        sub_dungeons_by_dungeon_id = defaultdict(set)
+        for sub_dungeon in self.get_all_sub_dungeons(server=server):
+            sub_dungeons_by_dungeon_id[sub_dungeon.dungeon_id].add(sub_dungeon)
 
         suffix = ""
         if server == Server.NA:
             suffix = '_na'
 
         result = self.database.query_many(f"SELECT * FROM dungeons{suffix}")
-        return [DungeonModel(sorted(self._sub_dungeons_by_dungeon_id[server][r.dungeon_id],
+        return [DungeonModel(sorted(sub_dungeons_by_dungeon_id[r.dungeon_id],
                                     key=lambda sd: sd.sub_dungeon_id),
                              **r) for r in result]
 
     def get_dungeon(self, dungeon_id: int, *, server: Server = DEFAULT_SERVER) -> Optional[DungeonModel]:
-        if server not in self._dungeon_map:
-            self._dungeon_map[server] = {e.dungeon_id: e for e in self.get_all_dungeons(server=server)}
-        return self._dungeon_map[server].get(dungeon_id)
+        dungeon_map = self.cache.get_table(
+            ('dungeon_map', server),
+            lambda: {e.dungeon_id: e for e in self.get_all_dungeons(server=server)})
+        return dungeon_map.get(dungeon_id)
 
-    @lru_cache(maxsize=None)
     def get_subdungeons_from_drop_monster(self, monster: MonsterModel) -> List[SubDungeonModel]:
+        # Keyed by id rather than by the model so that the cache doesn't keep monsters alive
+        server = monster.server_priority
+        return self.cache.get_lookup(('drops', monster.monster_id, server),
+                                     lambda: self._load_subdungeons_from_drop_monster(monster.monster_id, server))
+
+    def _load_subdungeons_from_drop_monster(self, monster_id: int, server: Server) -> List[SubDungeonModel]:
         suffix = ""
-        if monster.server_priority == Server.NA:
+        if server == Server.NA:
             suffix = '_na'
 
-        rows = self.database.query_many(DROP_QUERY.format(suffix), (monster.monster_id,))
-        return [self.get_sub_dungeon(row.sub_dungeon_id, server=monster.server_priority) for row in rows]
+        rows = self.database.query_many(DROP_QUERY.format(suffix), (monster_id,))
+        return [self.get_sub_dungeon(row.sub_dungeon_id, server=server) for row in rows]
 
     def get_dungeon_mapping(self, subdungeons: Iterable[SubDungeonModel]) -> Mapping[DungeonModel, List[SubDungeonModel]]:
         mapping = defaultdict(list)
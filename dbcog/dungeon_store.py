@@ -0,0 +1,108 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from tsutils.enums import Server
+
+from .database_manager import DBCogDatabase
+from .models.encounter_model import EncounterModel
+from .models.enemy_data_model import EnemyDataModel
+
+STORE_QUERY = '''
+SELECT
+    encounters.encounter_id,
+    encounters.sub_dungeon_id,
+    encounters.enemy_id,
+    encounters.monster_id,
+    encounters.stage,
+    encounters.amount,
+    encounters.turns,
+    encounters.level,
+    encounters.hp,
+    encounters.atk,
+    encounters.defense,
+    enemy_data{0}.enemy_id AS data_enemy_id,
+    enemy_data{0}.behavior
+FROM
+    encounters
+    LEFT OUTER JOIN enemy_data{0} ON encounters.enemy_id = enemy_data{0}.enemy_id
+ORDER BY
+    encounters.sub_dungeon_id,
+    encounters.stage,
+    encounters.encounter_id
+'''
+
+# Stage that invading monsters are stored under
+INVADE_STAGE = -1
+# Stands in for NULL in the integer columns
+NULL = -2 ** 63
+
+
+class DungeonStore:
+    """Every encounter on a server, packed into arrays so that paging through a dungeon never hits the database.
+
+    Encounters are sorted by sub dungeon, floor, and encounter id, so each floor is a contiguous range of
+    rows.  Enemy behaviors are stored once per enemy in a single buffer.  Models are only made for the
+    rows that are asked for.
+    """
+    COLUMNS = ('encounter_id', 'sub_dungeon_id', 'enemy_id', 'monster_id', 'stage', 'amount', 'turns', 'level',
+               'hp', 'atk', 'defense')
+
+    def __init__(self):
+        self._columns: Dict[str, array] = {column: array('q') for column in self.COLUMNS}
+        # Row ranges of each floor, keyed by (sub_dungeon_id, stage)
+        self._floors: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        # Where each enemy's behavior is in _behaviors.  A length of -1 means the behavior is NULL.
+        self._behavior_spans: Dict[int, Tuple[int, int]] = {}
+        self._behaviors = b''
+
+    def __len__(self):
+        return len(self._columns['encounter_id'])
+
+    @classmethod
+    def build(cls, database: DBCogDatabase, server: Server) -> "DungeonStore":
+        suffix = '_na' if server == Server.NA else ''
+        store = cls()
+        behaviors = bytearray()
+        floor_key, floor_start = None, 0
+        for row in database.iter_query(STORE_QUERY.format(suffix)):
+            index = len(store)
+            for column in cls.COLUMNS:
+                store._columns[column].append(row[column] if row[column] is not None else NULL)
+
+            key = (row['sub_dungeon_id'], row['stage'])
+            if key != floor_key:
+                if floor_key is not None:
+                    store._floors[floor_key] = (floor_start, index)
+                floor_key, floor_start = key, index
+
+            enemy_id = row['data_enemy_id']
+            if enemy_id is not None and enemy_id not in store._behavior_spans:
+                behavior = row['behavior']
+                if behavior is None:
+                    store._behavior_spans[enemy_id] = (0, -1)
+                else:
+                    store._behavior_spans[enemy_id] = (len(behaviors), len(behavior))
+                    behaviors += behavior
+        if floor_key is not None:
+            store._floors[floor_key] = (floor_start, len(store))
+        store._behaviors = bytes(behaviors)
+        return store
+
+    def get_enemy_data(self, enemy_id: int) -> Optional[EnemyDataModel]:
+        if enemy_id not in self._behavior_spans:
+            return None
+        start, length = self._behavior_spans[enemy_id]
+        behavior = self._behaviors[start:start + length] if length != -1 else None
+        return EnemyDataModel(enemy_id=enemy_id, behavior=behavior)
+
+    def _encounter(self, index: int) -> EncounterModel:
+        row = {column: values[index] if values[index] != NULL else None for column, values in self._columns.items()}
+        return EncounterModel(self.get_enemy_data(row['enemy_id']), **row)
+
+    def get_floor(self, sub_dungeon_id: int, floor: int) -> List[EncounterModel]:
+        """The encounters on a floor followed by the floor's invades"""
+        encounters = []
+        for stage in dict.fromkeys((floor, INVADE_STAGE)):
+            start, end = self._floors.get((sub_dungeon_id, stage), (0, 0))
+            encounters.extend(self._encounter(index) for index in range(start, end))
+        return encounters
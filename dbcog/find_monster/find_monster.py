@@ -7,29 +7,22 @@ from tsutils.formatting import rmdiacritics
 from tsutils.query_settings.query_settings import QuerySettings
 
 from dbcog.find_monster.extra_info import ExtraInfo
+from dbcog.find_monster.priority import get_static_priority
 from dbcog.find_monster.tokens.find_monster_tokens import EPSILON, MODIFIER_JW_DISTANCE, MatchData, MatchMap, \
-    MonsterInfo, MonsterMatch, QueryToken, SpecialToken, \
+    MonsterInfo, MonsterMatch, QueryToken, RegularToken, SpecialToken, \
     TOKEN_JW_DISTANCE, TokenMatch, calc_ratio_modifier, calc_ratio_name, string_to_token
 from dbcog.models.monster_model import MonsterModel
 
-SERIES_TYPE_PRIORITY = {
-    "regular": 4,
-    "event": 4,
-    "seasonal": 3,
-    "ghcollab": 2,
-    "collab": 1,
-    "lowpriority": 0,
-    None: 0
-}
-
 
 class FindMonster:
     TOKEN_JW_DISTANCE = TOKEN_JW_DISTANCE
     MODIFIER_JW_DISTANCE = MODIFIER_JW_DISTANCE
 
-    def __init__(self, dbcog, flags: Dict[str, Any]):
+    def __init__(self, dbcog, flags: Dict[str, Any], *, prune_name_tokens: bool = True, use_cache: bool = True):
         self.dbcog = dbcog
         self.flags = flags
+        self.prune_name_tokens = prune_name_tokens
+        self.use_cache = use_cache
         self.index = self.dbcog.indexes[Server(flags['server'])]
 
     async def _process_settings(self, original_query: str) -> str:
@@ -145,11 +138,19 @@ class FindMonster:
     async def _get_valid_monsters_from_name_token(self, token: QueryToken, matches: MatchMap,
                                                   mult: Union[int, float] = 1) -> Set[MonsterModel]:
         valid_monsters = set()
-        all_monsters_name_tokens_scores = {nt: self.calc_ratio_name(token, nt) for nt in
-                                           self.index.all_name_tokens}
+        if self.prune_name_tokens:
+            candidates = self.index.name_token_index.candidates(token.value, TOKEN_JW_DISTANCE)
+            prefixed = self.index.name_token_index.prefixed(token.value)
+        else:
+            candidates = self.index.all_name_tokens
+            prefixed = [t for t in self.index.all_name_tokens if t.startswith(token.value)]
+        all_monsters_name_tokens_scores = {nt: self.calc_ratio_name(token, nt) for nt in candidates}
         matched_tokens = sorted((nt for nt, s in all_monsters_name_tokens_scores.items() if s > TOKEN_JW_DISTANCE),
                                 key=lambda nt: all_monsters_name_tokens_scores[nt], reverse=True)
-        matched_tokens += [t for t in self.index.all_name_tokens if t.startswith(token.value)]
+        for nt in prefixed:
+            if nt not in all_monsters_name_tokens_scores:
+                all_monsters_name_tokens_scores[nt] = self.calc_ratio_name(token, nt)
+        matched_tokens += prefixed
         for match in matched_tokens:
             score = all_monsters_name_tokens_scores[match]
 
@@ -169,23 +170,81 @@ class FindMonster:
 
     async def _process_modifiers(self, mod_tokens: Set[QueryToken], potential_evos: Set[MonsterModel],
                                  matches: MatchMap) -> Set[MonsterModel]:
+        modifier_index = self.index.modifier_index
+        # While only plain modifier tokens have been processed, the remaining monsters are kept as a bitmask
+        bits = None
         for mod_token in mod_tokens:
+            if self._matches_by_modifier_index(mod_token):
+                if bits is None:
+                    bits = modifier_index.to_bits(potential_evos)
+                if bits is not None:
+                    bits = self._filter_by_modifier_index(mod_token, bits, matches)
+                    if not bits:
+                        return set()
+                    continue
+
+            if bits is not None:
+                potential_evos = modifier_index.from_bits(bits)
+                bits = None
             potential_evos = {m for m in potential_evos if
                               await self._monster_has_modifier(m, mod_token, matches)}
             if not potential_evos:
                 return set()
+
+        if bits is not None:
+            return modifier_index.from_bits(bits)
         return potential_evos
 
-    def get_priority_tuple(self, monster: MonsterModel, tokenized_query: List[str] = None, matches: MatchMap = None) \
-            -> Tuple[Any, ...]:
+    @staticmethod
+    def _matches_by_modifier_index(token: QueryToken) -> bool:
+        """Whether a token can be matched against the modifier index instead of one monster at a time.
+
+        Long exact tokens are left to RegularToken.matches, which doesn't only match the exact modifier.
+        """
+        return type(token) is RegularToken and (len(token.value) < 6 or not token.exact)
+
+    def _filter_by_modifier_index(self, token: QueryToken, bits: int, matches: MatchMap) -> int:
+        """Equivalent to calling _monster_has_modifier on each monster in bits, but with one fuzzy match of
+        the token against the modifier vocabulary instead of one per modifier per monster."""
+        modifier_index = self.index.modifier_index
+        if len(token.value) < 6:
+            ratios = {token.value: 1.0} if token.value in modifier_index.bits else {}
+        else:
+            ratios = {mod: ratio for mod in modifier_index.bits
+                      if (ratio := self.calc_ratio_modifier(token, mod)) > MODIFIER_JW_DISTANCE}
+
+        matched_bits = modifier_index.any_of(ratios) & bits
+        for monster in modifier_index.from_bits(matched_bits):
+            # Match the monster's best modifier, breaking ties the same way RegularToken.matches does
+            matched_token = max((mod for mod in self.index.modifiers[monster] if mod in ratios),
+                                key=ratios.__getitem__)
+            ratio = self.calc_ratio_modifier(matched_token, token.value)
+            if ratio <= MODIFIER_JW_DISTANCE:
+                matched_bits &= ~(1 << modifier_index.ordinals[monster.monster_id])
+                continue
+            matches[monster].score += ratio
+            matches[monster].mod.add(TokenMatch(token.value, matched_token, MatchData(token)))
+
+        if token.negated:
+            return bits & ~matched_bits
+        return matched_bits
+
+    def get_priority_tuple(self, monster: MonsterModel, tokenized_query: List[str] = None, matches: MatchMap = None,
+                           *, query_has_id: Optional[bool] = None) -> Tuple[Any, ...]:
         """Get the priority tuple for a monster.
 
-        This is a comparable tuple that's used to sort how well a monster matches a query.
+        This is a comparable tuple that's used to sort how well a monster matches a query.  The parts that
+        don't depend on the query are precomputed by the index.  When ranking many monsters against the
+        same query, pass query_has_id so the query doesn't need to be checked for each one.
         """
         if matches is None:
             matches = defaultdict(MonsterMatch)
-        if tokenized_query is None:
-            tokenized_query = []
+        if query_has_id is None:
+            query_has_id = self.query_has_id(tokenized_query or [])
+
+        static = self.index.priorities.get(monster)
+        if static is None:
+            static = get_static_priority(self.dbcog.database.graph, monster)
 
         or_prio_score = sum(match.match_data.or_index[0]
                             for match in matches[monster].mod
@@ -193,23 +252,27 @@ class FindMonster:
 
         return (matches[monster].score,
                 -or_prio_score if self.flags['ormod_prio'] else 0,
-                not self.dbcog.database.graph.monster_is_evo_gem(monster),
+                static.not_evo_gem,
                 # Don't deprio evos with new modifier
-                not monster.is_equip if not {m[0] for m in matches[monster].mod}.intersection(
+                static.not_equip if not {m[0] for m in matches[monster].mod}.intersection(
                     {'new', 'base'}) else True,
                 # Match na on id overlap
-                bool(monster.monster_id > 50000 and re.search(r"\d{4}", " ".join(tokenized_query))),
-                SERIES_TYPE_PRIORITY.get(monster.series.series_type),
-                monster.on_na if monster.series.series_type == "collab" else True,
-                self.dbcog.database.graph.monster_is_rem_evo(monster),
-                not all(t.value in [0, 12, 14, 15] for t in monster.types),
-                not any(t.value in [0, 12, 14, 15] for t in monster.types),
-                -self.dbcog.database.graph.get_base_id(monster),
-                monster.on_na if self.flags['na_prio'] else True,
-                not monster.is_equip,
-                self.dbcog.database.graph.get_adjusted_rarity(monster),
+                query_has_id and monster.monster_id > 50000,
+                static.series_priority,
+                static.collab_on_na,
+                static.rem_evo,
+                static.not_all_fodder_types,
+                static.not_any_fodder_types,
+                static.neg_base_id,
+                static.on_na if self.flags['na_prio'] else True,
+                static.not_equip,
+                static.adjusted_rarity,
                 -or_prio_score,
-                monster.monster_no)
+                static.monster_no)
+
+    @staticmethod
+    def query_has_id(tokenized_query: List[str]) -> bool:
+        return bool(re.search(r"\d{4}", " ".join(tokenized_query)))
 
     def _get_monster_evos(self, matched_mons: Set[MonsterModel], matches: MatchMap) -> Set[MonsterModel]:
         monster_evos = set()
@@ -232,7 +295,9 @@ class FindMonster:
         if tokenized_query is None:
             tokenized_query = []
 
-        return max(monsters, key=lambda m: self.get_priority_tuple(m, tokenized_query, matches))
+        query_has_id = self.query_has_id(tokenized_query)
+        return max(monsters, key=lambda m: self.get_priority_tuple(m, tokenized_query, matches,
+                                                                   query_has_id=query_has_id))
 
     async def _find_monster_search(self, tokenized_query: List[str]) -> \
             Tuple[Optional[MonsterModel], MatchMap, Set[MonsterModel]]:
@@ -279,7 +344,8 @@ class FindMonster:
         """Get debug info from a search.
 
         This gives info that isn't necessary for non-debug functions.  Consider using
-        findmonster or findmonsters instead."""
+        findmonster or findmonsters instead.  Results are cached until the index is rebuilt,
+        so don't modify them."""
         await self.dbcog.wait_until_ready()
 
         query = query.split('//')[0]  # Remove comments
@@ -290,7 +356,15 @@ class FindMonster:
         query = re.sub(r'\[[^[]+]', lambda m: m.group(0).replace(' ', '\0'), query)
         query = re.sub(r'\([^(]+\)', lambda m: m.group(0).replace(' ', '\0'), query)
 
-        tokenized_query = (await self._process_settings(query)).split()
+        query = await self._process_settings(query)
+
+        # Results only depend on the query, the ranking flags, and which index they came from
+        cache_key = (' '.join(query.split()), self.flags['na_prio'], self.flags['ormod_prio'],
+                     self.index.server, self.dbcog.index_generation)
+        if self.use_cache and (cached := self.dbcog.query_cache.get(cache_key)) is not None:
+            return cached
+
+        tokenized_query = query.split()
         tokenized_query = [token.replace('\0', ' ') for token in tokenized_query]
         mw_tokenized_query = self._merge_multi_word_tokens(tokenized_query)
         best_monster, matches_dict, valid_monsters = max(
@@ -303,18 +377,44 @@ class FindMonster:
 
         monster_info = MonsterInfo(best_monster, matches_dict, valid_monsters)
         extra_info = ExtraInfo.build_extra_info(matches_dict)
+        if self.use_cache:
+            self.dbcog.query_cache.put(cache_key, (monster_info, extra_info))
         return monster_info, extra_info
 
     async def find_monster(self, query: str) -> Tuple[Optional[MonsterModel], ExtraInfo]:
         """Get the best matching monster for a query.  Returns None if no eligable monsters exist."""
+        if (monster := await self.find_monster_by_number(query)) is not None:
+            return monster, ExtraInfo.build_extra_info({})
         m_info, e_info = await self.find_monster_debug(query)
         return m_info.matched_monster, e_info
 
+    async def find_monster_by_number(self, query: str) -> Optional[MonsterModel]:
+        """Resolve a query that's just a monster number without running the full search.
+
+        For a bare number, the full search always picks the best ranked monster whose card number (NA if
+        it has one, otherwise JP) or NA id exactly matches, so that's looked up directly.  Returns None if
+        the query isn't a plain number or nothing matches it exactly, and the full search should be used.
+        """
+        number = query.strip()
+        if not re.fullmatch(r'[0-9]+', number):
+            return None
+
+        await self.dbcog.wait_until_ready()
+        self.index = await self.dbcog.get_index(Server(self.flags['server']))
+        return self.monster_by_number(number)
+
+    def monster_by_number(self, number: str) -> Optional[MonsterModel]:
+        """The monster a plain number resolves to in the current index, or None if nothing matches it exactly"""
+        candidates = self.index.manual.get(number)
+        if not candidates:
+            return None
+        return self.get_most_eligable_monster(candidates, [number])
+
     async def find_monsters(self, query: str) -> Tuple[List[MonsterModel], ExtraInfo]:
         """Get a list of monsters sorted by how well they match"""
         m_info, e_info = await self.find_monster_debug(query)
         return sorted(m_info.valid_monsters,
-                      key=lambda m: self.get_priority_tuple(m, matches=m_info.monster_matches),
+                      key=lambda m: self.get_priority_tuple(m, matches=m_info.monster_matches, query_has_id=False),
                       reverse=True), e_info
 
     def calc_ratio_modifier(self, s1: Union[QueryToken, str], s2: str, prefix_weight: float = .05) -> float:
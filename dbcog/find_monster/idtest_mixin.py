@@ -1,6 +1,7 @@
 import re
+import time
 from datetime import datetime
-from typing import Callable, Coroutine, List, Optional
+from typing import Any, Callable, Coroutine, Dict, List, Optional
 
 from redbot.core import Config, checks, commands
 from redbot.core.bot import Red
@@ -9,6 +10,7 @@ from redbot.core.utils.chat_formatting import box, pagify
 from tsutils.enums import Server
 from tsutils.user_interaction import get_user_confirmation, get_user_reaction
 
+from dbcog.find_monster.find_monster import FindMonster
 from dbcog.models.enum_types import DEFAULT_SERVER
 from dbcog.models.monster_model import MonsterModel
 from dbcog.monster_index import MonsterIndex
@@ -17,6 +19,7 @@ from dbcog.monster_index import MonsterIndex
 class IdTest:
     bot: Red
     config: Config
+    fm_flags_default: Dict[str, Any]
     get_index: Callable[[Server], Coroutine[None, None, MonsterIndex]]
     find_monster: Callable[[int], Coroutine[None, None, MonsterModel]]
     wait_until_ready: Callable[[], Coroutine[None, None, None]]
@@ -421,6 +424,45 @@ class IdTest:
         for page in pagify(o):
             await ctx.send(box(page))
 
+    @idtest.command(name="bench", aliases=["benchmark"])
+    @checks.is_owner()
+    async def idt_bench(self, ctx):
+        """Time the id3 test suite with and without name token pruning"""
+        suite = await self.config.test_suite()
+        if not suite:
+            await ctx.send("No tests found.")
+            return
+        await self.wait_until_ready()
+
+        timings = {}
+        results = {}
+        async with ctx.typing():
+            for prune in (False, True):
+                results[prune] = {}
+                start = time.perf_counter()
+                async for q in AsyncIter(sorted(suite)):
+                    try:
+                        monster, _ = await FindMonster(self, self.fm_flags_default, prune_name_tokens=prune,
+                                                       use_cache=False).find_monster(q)
+                    except Exception:
+                        mid = -2
+                    else:
+                        mid = -1 if monster is None else monster.monster_id
+                    results[prune][q] = mid
+                timings[prune] = time.perf_counter() - start
+
+        o = (f"Ran {len(suite)} queries.\n"
+             f"Full scan: {timings[False]:.2f}s ({1000 * timings[False] / len(suite):.2f}ms/query)\n"
+             f"Pruned:    {timings[True]:.2f}s ({1000 * timings[True] / len(suite):.2f}ms/query)\n")
+        diffs = [q for q in sorted(suite) if results[False][q] != results[True][q]]
+        if diffs:
+            o += f"\n{len(diffs)} queries had different results:\n"
+            o += "\n".join(f"{q}: {results[False][q]} -> {results[True][q]}" for q in diffs)
+        else:
+            o += "\nAll results were identical."
+        for page in pagify(o):
+            await ctx.send(box(page))
+
     @idt_name.command(name="run")
     async def idtn_run(self, ctx):
         """Run all name/fluff tests"""
@@ -0,0 +1,50 @@
+from typing import NamedTuple, TYPE_CHECKING
+
+from dbcog.models.monster_model import MonsterModel
+
+if TYPE_CHECKING:
+    from dbcog.monster_graph import MonsterGraph
+
+SERIES_TYPE_PRIORITY = {
+    "regular": 4,
+    "event": 4,
+    "seasonal": 3,
+    "ghcollab": 2,
+    "collab": 1,
+    "lowpriority": 0,
+    None: 0
+}
+
+# Evolve, Awoken, Enhance, and Vendor material types
+FODDER_TYPE_VALUES = (0, 12, 14, 15)
+
+
+class StaticPriority(NamedTuple):
+    """The parts of a monster's priority tuple that don't depend on the query"""
+    not_evo_gem: bool
+    series_priority: int
+    collab_on_na: bool
+    rem_evo: bool
+    not_all_fodder_types: bool
+    not_any_fodder_types: bool
+    neg_base_id: int
+    on_na: bool
+    not_equip: bool
+    adjusted_rarity: float
+    monster_no: int
+
+
+def get_static_priority(graph: "MonsterGraph", monster: MonsterModel) -> StaticPriority:
+    return StaticPriority(
+        not_evo_gem=not graph.monster_is_evo_gem(monster),
+        series_priority=SERIES_TYPE_PRIORITY.get(monster.series.series_type),
+        collab_on_na=monster.on_na if monster.series.series_type == "collab" else True,
+        rem_evo=graph.monster_is_rem_evo(monster),
+        not_all_fodder_types=not all(t.value in FODDER_TYPE_VALUES for t in monster.types),
+        not_any_fodder_types=not any(t.value in FODDER_TYPE_VALUES for t in monster.types),
+        neg_base_id=-graph.get_base_id(monster),
+        on_na=monster.on_na,
+        not_equip=not monster.is_equip,
+        adjusted_rarity=graph.get_adjusted_rarity(monster),
+        monster_no=monster.monster_no,
+    )
@@ -379,9 +379,7 @@ class SeriesOf(SubqueryToken):
         super().__init__(fullvalue, subquery, negated=negated, exact=exact, dbcog=dbcog)
 
     def get_matching_monsters(self, monster):
-        return self.dbcog.database.get_monsters_where(lambda m: m.series_id == monster.series_id,
-                                                      server=monster.server_priority,
-                                                      cache_key=('series_id', monster.series_id))
+        return self.dbcog.database.get_monsters_by_series(monster.series_id, server=monster.server_priority)
 
 
 class SameEvoTree(SubqueryToken):
@@ -0,0 +1,42 @@
+import asyncio
+from contextlib import suppress
+
+
+class LoopBlockMonitor:
+    """Measures how long the event loop is blocked while this context is active.
+
+    A ticker task sleeps for a short interval, and any time it takes to wake up beyond that interval is
+    counted as time that the loop was blocked by something else.
+    """
+
+    def __init__(self, interval: float = .05, threshold: float = .01):
+        self.interval = interval
+        self.threshold = threshold
+
+        self.total_blocked = 0.0
+        self.longest_block = 0.0
+        self.elapsed = 0.0
+
+        self._task = None
+        self._start = 0.0
+
+    async def __aenter__(self) -> "LoopBlockMonitor":
+        self._start = asyncio.get_running_loop().time()
+        self._task = asyncio.create_task(self._tick())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self.elapsed = asyncio.get_running_loop().time() - self._start
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - start - self.interval
+            if lag > self.threshold:
+                self.total_blocked += lag
+                self.longest_block = max(self.longest_block, lag)
@@ -0,0 +1,40 @@
+import gc
+import os
+import sys
+from typing import Any, Dict, Iterable, Optional, Set
+
+
+def rss_bytes() -> Optional[int]:
+    """The resident set size of this process, or None if it can't be read on this platform"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # This is the peak rather than the current size, and it's in kilobytes everywhere but macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def deep_sizeof(roots: Iterable[Any], exclude: Iterable[Any] = ()) -> Dict[str, int]:
+    """Sizes of everything reachable from roots, summed per type name.
+
+    Objects are followed through the garbage collector's referents, so this counts dicts, slots, and
+    containers alike.  Types, modules, and anything in exclude aren't counted or followed.
+    """
+    seen: Set[int] = {id(obj) for obj in exclude}
+    sizes: Dict[str, int] = {}
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, type(sys))):
+            continue
+        seen.add(id(obj))
+        name = type(obj).__name__
+        sizes[name] = sizes.get(name, 0) + sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return sizes
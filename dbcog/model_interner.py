@@ -0,0 +1,73 @@
+from typing import Any, Dict, Hashable, Tuple, Type, TypeVar
+
+from .models.base_model import BaseModel
+from .models.monster_model import MonsterModel
+
+T = TypeVar('T')
+
+_slot_cache: Dict[type, Tuple[str, ...]] = {}
+
+
+def _slots(cls: Type[BaseModel]) -> Tuple[str, ...]:
+    if cls not in _slot_cache:
+        _slot_cache[cls] = tuple(slot for klass in reversed(cls.__mro__)
+                                 for slot in getattr(klass, '__slots__', ()))
+    return _slot_cache[cls]
+
+
+def model_key(value: Any) -> Hashable:
+    """A hashable key that's equal for two models exactly when all of their fields are"""
+    if isinstance(value, BaseModel):
+        return (type(value),) + tuple(model_key(getattr(value, slot, None)) for slot in _slots(type(value)))
+    if isinstance(value, (list, tuple)):
+        return tuple(model_key(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(model_key(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, model_key(v)) for k, v in value.items()))
+    return value
+
+
+class ModelInterner:
+    """Canonical instances of the models that many monsters share.
+
+    Leader skills and awoken skills are built once per monster, and the COMBINED and NA graphs are built
+    in separate processes, so identical series and skills end up as separate objects.  Interning swaps
+    each of them for the first equal instance seen.  Only slotted models can be interned.
+    """
+
+    def __init__(self):
+        self._canonical: Dict[Hashable, Any] = {}
+        # Most models are already shared between the monsters of one graph, so remember every object
+        # we've seen (keeping it alive so its id can't be reused) and only compute each key once
+        self._seen: Dict[int, Tuple[Any, Any]] = {}
+
+    def intern(self, model: T) -> T:
+        if (seen := self._seen.get(id(model))) is not None:
+            return seen[1]
+        canonical = self._canonical.setdefault(model_key(model), model)
+        self._seen[id(model)] = (model, canonical)
+        return canonical
+
+    def seed_monster(self, m: MonsterModel) -> None:
+        """Make the shared models of a monster canonical without touching the monster itself"""
+        for series in m.all_series | {m.series}:
+            self.intern(series)
+        if m.leader_skill is not None:
+            self.intern(m.leader_skill)
+        if m.active_skill is not None:
+            self.intern(m.active_skill)
+        for awakening in m.awakenings:
+            self.intern(awakening.awoken_skill)
+            self.intern(awakening)
+
+    def intern_monster(self, m: MonsterModel) -> None:
+        m.series = self.intern(m.series)
+        m.all_series = {self.intern(series) for series in m.all_series}
+        if m.leader_skill is not None:
+            m.leader_skill = self.intern(m.leader_skill)
+        if m.active_skill is not None:
+            m.active_skill = self.intern(m.active_skill)
+        for awakening in m.awakenings:
+            awakening.awoken_skill = self.intern(awakening.awoken_skill)
+        m.awakenings = [self.intern(awakening) for awakening in m.awakenings]
@@ -4,6 +4,9 @@ from .base_model import BaseModel
 
 
 class ActivePartModel(BaseModel):
+    __slots__ = ('active_part_id', 'active_skill_type_id', 'desc_ja', 'desc_en', 'desc_ko', 'desc_templated_ja',
+                 'desc_templated_en', 'desc_templated_ko', 'desc', 'desc_templated')
+
     def __init__(self, **kwargs):
         self.active_part_id = kwargs['active_part_id']
         self.active_skill_type_id = kwargs['active_skill_type_id']
@@ -27,6 +30,10 @@ class ActivePartModel(BaseModel):
 
 
 class ActiveSubskillModel(BaseModel):
+    __slots__ = ('active_subskill_id', 'name_ja', 'name_en', 'name_ko', 'desc_ja', 'desc_en', 'desc_ko',
+                 'desc_templated_ja', 'desc_templated_en', 'desc_templated_ko', 'board_65', 'board_76', 'cooldown',
+                 'active_parts', 'name', 'desc', 'desc_templated')
+
     def __init__(self, *, active_parts: Sequence[Union[ActivePartModel, Dict[str, Any]]], **kwargs):
         if active_parts and isinstance(active_parts[0], dict):
             active_parts = [ActivePartModel(**ap) for ap in active_parts]
@@ -61,6 +68,11 @@ class ActiveSubskillModel(BaseModel):
 
 
 class ActiveSkillModel(BaseModel):
+    __slots__ = ('active_skill_id', 'compound_skill_type_id', 'name_ja', 'name_en', 'name_ko', 'desc_ja', 'desc_en',
+                 'desc_ko', 'desc_templated_ja', 'desc_templated_en', 'desc_templated_ko', 'desc_official_ja',
+                 'desc_official_en', 'desc_official_ko', 'cooldown_turns_max', 'cooldown_turns_min',
+                 'active_subskills', 'name', 'desc', 'desc_templated')
+
     def __init__(self, *, active_subskills: Sequence[Union[ActiveSubskillModel, Dict[str, Any]]], **kwargs):
         if active_subskills and isinstance(active_subskills[0], dict):
             active_subskills = [ActiveSubskillModel(**ass) for ass in active_subskills]
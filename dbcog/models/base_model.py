@@ -2,6 +2,8 @@ import json
 
 
 class BaseModel(object):
+    # Subclasses declare their own slots.  Any that don't still get a __dict__.
+    __slots__ = ()
 
     def to_dict(self):
         raise NotImplementedError
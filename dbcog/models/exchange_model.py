@@ -7,6 +7,9 @@ from .base_model import BaseModel
 
 
 class ExchangeModel(BaseModel):
+    __slots__ = ('trade_id', 'server', 'target_monster_id', 'required_monster_ids', 'required_count',
+                 'start_timestamp', 'end_timestamp', 'permanent', 'menu_idx', 'order_idx', 'flags', 'tstamp')
+
     def __init__(self, **kwargs):
         self.trade_id = kwargs['trade_id']
         self.server = Server(('JP', 'NA', 'KR')[kwargs['server_id']])
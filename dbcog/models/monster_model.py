@@ -1,6 +1,6 @@
 import re
 from datetime import datetime
-from typing import Set, Optional, List, Dict, Any
+from typing import Set, Optional, List, Dict
 
 import romkan
 from tsutils.enums import Server
@@ -17,6 +17,18 @@ from .series_model import SeriesModel
 
 
 class MonsterModel(BaseModel):
+    # There are tens of thousands of these, so don't give each one a __dict__
+    __slots__ = ('monster_id', 'monster_no_jp', 'monster_no_na', 'monster_no_kr', 'monster_no', 'base_evo_id',
+                 'on_jp', 'on_na', 'on_kr', 'awakenings', 'leader_skill', 'leader_skill_id', 'active_skill',
+                 'active_skill_id', 'series', 'all_series', 'series_id', 'group_id', 'collab_id', 'name_ja',
+                 'name_ko', 'name_en', 'unoverridden_name_en', 'roma_subname', 'name_en_override', 'type1', 'type2',
+                 'type3', 'types', 'rarity', 'is_farmable', 'in_rem', 'in_pem', 'in_vem', 'buy_mp', 'sell_gold',
+                 'sell_mp', 'reg_date', 'attr1', 'attr2', 'attr3', 'is_inheritable', 'is_stackable', 'evo_gem_id',
+                 'orb_skin_id', 'bgm_id', 'cost', 'exp', 'fodder_exp', 'level', 'latent_slots', 'limit_mult',
+                 'hp_max', 'hp_min', 'hp_scale', 'atk_max', 'atk_min', 'atk_scale', 'rcv_max', 'rcv_min',
+                 'rcv_scale', 'voice_id_jp', 'voice_id_na', 'has_animation', 'has_hqimage', 'server_priority',
+                 'drop_id', 'mp4_size', 'gif_size', 'hq_png_size', 'hq_gif_size', 'icon_cachebreak')
+
     def __init__(self, **m):
         super().__init__()
         self.monster_id: int = m['monster_id']
@@ -32,7 +44,6 @@ class MonsterModel(BaseModel):
         self.on_kr: bool = m['on_kr']
 
         self.awakenings: List[AwakeningModel] = sorted(m['awakenings'], key=lambda a: a.order_idx)
-        self.superawakening_count: int = sum(int(a.is_super) for a in self.awakenings)
         self.leader_skill: LeaderSkillModel = m['leader_skill']
         self.leader_skill_id: int = self.leader_skill.leader_skill_id if self.leader_skill else None
         self.active_skill: ActiveSkillModel = m['active_skill']
@@ -75,7 +86,6 @@ class MonsterModel(BaseModel):
         self.in_rem: bool = m['in_rem']
         self.in_pem: bool = m['in_pem']
         self.in_vem: bool = m['in_vem']
-        self.in_mpshop: bool = m['buy_mp'] is not None
         self.buy_mp: int = m['buy_mp']
         self.sell_gold: int = m['sell_gold']
         self.sell_mp: int = m['sell_mp']
@@ -83,7 +93,6 @@ class MonsterModel(BaseModel):
         self.attr1: Optional[Attribute] = enum_or_none(Attribute, m['attribute_1_id'], Attribute.Nil)
         self.attr2: Optional[Attribute] = enum_or_none(Attribute, m['attribute_2_id'], Attribute.Nil)
         self.attr3: Optional[Attribute] = enum_or_none(Attribute, m['attribute_3_id'], Attribute.Nil)
-        self.is_equip: bool = any([x.awoken_skill_id == 49 for x in self.awakenings])
         self.is_inheritable: bool = m['is_inheritable']
         self.is_stackable: bool = m['is_stackable']
         self.evo_gem_id: Optional[int] = m['evo_gem_id']
@@ -108,11 +117,6 @@ class MonsterModel(BaseModel):
         self.rcv_max: int = m['rcv_max']
         self.rcv_min: int = m['rcv_min']
         self.rcv_scale: int = m['rcv_scale']
-        self.stat_values: Dict[Any] = {
-            'hp': {'min': self.hp_min, 'max': self.hp_max, 'scale': self.hp_scale},
-            'atk': {'min': self.atk_min, 'max': self.atk_max, 'scale': self.atk_scale},
-            'rcv': {'min': self.rcv_min, 'max': self.rcv_max, 'scale': self.rcv_scale}
-        }
 
         self.voice_id_jp: Optional[int] = m['voice_id_jp']
         self.voice_id_na: Optional[int] = m['voice_id_na']
@@ -129,6 +133,26 @@ class MonsterModel(BaseModel):
         self.hq_gif_size = m['hq_gif_size']
         self.icon_cachebreak = m['icon_cachebreak']
 
+    @property
+    def superawakening_count(self) -> int:
+        return sum(int(a.is_super) for a in self.awakenings)
+
+    @property
+    def in_mpshop(self) -> bool:
+        return self.buy_mp is not None
+
+    @property
+    def is_equip(self) -> bool:
+        return any(x.awoken_skill_id == 49 for x in self.awakenings)
+
+    @property
+    def stat_values(self) -> Dict[str, Dict[str, int]]:
+        return {
+            'hp': {'min': self.hp_min, 'max': self.hp_max, 'scale': self.hp_scale},
+            'atk': {'min': self.atk_min, 'max': self.atk_max, 'scale': self.atk_scale},
+            'rcv': {'min': self.rcv_min, 'max': self.rcv_max, 'scale': self.rcv_scale}
+        }
+
     @property
     def killers(self):
         type_to_killers_map = {
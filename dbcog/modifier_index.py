@@ -0,0 +1,64 @@
+from collections import defaultdict
+from typing import Iterable, Mapping, Optional, Sequence, Set
+
+from .models.monster_model import MonsterModel
+
+
+class ModifierIndex:
+    """An inverted index from each modifier to the set of monsters that have it.
+
+    Monsters are numbered by the graph's dense ordinals and each set is stored as a bitmask in a Python
+    int, so intersecting and negating modifier matches over the whole roster is a handful of bigint
+    operations instead of a check per monster.
+    """
+
+    def __init__(self, modifiers: Mapping[MonsterModel, Set[str]], monsters: Sequence[MonsterModel],
+                 ordinals: Mapping[int, int]):
+        # These are shared with the graph (see MonsterGraph.get_monster_ordinals), not copied
+        self.monsters: Sequence[MonsterModel] = monsters
+        self.ordinals: Mapping[int, int] = ordinals
+        self.all_bits: int = (1 << len(self.monsters)) - 1
+
+        postings = defaultdict(list)
+        for m, mods in modifiers.items():
+            if (c := self.ordinals.get(m.monster_id)) is None:
+                continue
+            for mod in mods:
+                postings[mod].append(c)
+        self.bits: Dict[str, int] = {mod: self._ordinals_to_bits(ordinals) for mod, ordinals in postings.items()}
+
+    def __len__(self):
+        return len(self.monsters)
+
+    def _ordinals_to_bits(self, ordinals: Iterable[int]) -> int:
+        buffer = bytearray((len(self.monsters) + 7) // 8)
+        for c in ordinals:
+            buffer[c >> 3] |= 1 << (c & 7)
+        return int.from_bytes(buffer, 'little')
+
+    def to_bits(self, monsters: Iterable[MonsterModel]) -> Optional[int]:
+        """The bitmask of a collection of monsters, or None if any of them aren't in the index"""
+        ordinals = []
+        for m in monsters:
+            if (c := self.ordinals.get(m.monster_id)) is None or self.monsters[c] is not m:
+                return None
+            ordinals.append(c)
+        if len(ordinals) == len(self.monsters):
+            return self.all_bits
+        return self._ordinals_to_bits(ordinals)
+
+    def from_bits(self, bits: int) -> Set[MonsterModel]:
+        monsters = set()
+        for offset, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, 'little')):
+            while byte:
+                low = byte & -byte
+                monsters.add(self.monsters[(offset << 3) + low.bit_length() - 1])
+                byte ^= low
+        return monsters
+
+    def any_of(self, modifiers: Iterable[str]) -> int:
+        """The bitmask of monsters that have at least one of the given modifiers"""
+        bits = 0
+        for mod in modifiers:
+            bits |= self.bits.get(mod, 0)
+        return bits
@@ -1,14 +1,21 @@
+import hashlib
 import json
 import logging
+import multiprocessing
+import os
 import re
+import site
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Tuple, TypeVar, cast
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple, TypeVar, Union, cast
 
 from networkx import MultiDiGraph
 from tsutils.enums import Server
 
 from .database_manager import DBCogDatabase
+from .model_interner import ModelInterner
 from .models.active_skill_model import ActiveSkillModel
 from .models.awakening_model import AwakeningModel
 from .models.awoken_skill_model import AwokenSkillModel
@@ -20,6 +27,7 @@ from .models.leader_skill_model import LeaderSkillModel
 from .models.monster.monster_difference import MonsterDifference
 from .models.monster_model import MonsterModel
 from .models.series_model import SeriesModel
+from .overlay_graph import OverlayGraph
 
 logger = logging.getLogger('red.padbot-cogs.dbcog')
 
@@ -162,277 +170,575 @@ SERVER_ID_WHERE_CONDITION = " AND server_id = {}"
 
 ICON_CACHEBREAKS = {9806: "01", 9801: "01", 9610: "01"}
 
+# The servers that get their own graph
+GRAPH_SERVERS = (Server.COMBINED, Server.NA)
+# Edges that connect the monsters of an evo tree
+TREE_EDGE_TYPES = ('evolution', 'back_evolution', 'transformation', 'back_transformation')
+# Servers whose graphs are stored as an overlay on another server's graph.  Bases come first in GRAPH_SERVERS.
+OVERLAY_SERVERS = {Server.NA: Server.COMBINED}
+# The directory this cog's package is in, which graph build workers need on their sys.path
+COG_PARENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ServerData(NamedTuple):
+    # Newly built models by monster id
+    models: Dict[int, MonsterModel]
+
+    # Digest of every row that went into each monster's model
+    fingerprints: Dict[int, bytes]
+
+    # (from_id, to_id, edge attributes, digest of the edge's rows)
+    edges: List[Tuple[int, int, Dict[str, Any], Any]]
+
+    # Sorted outgoing edges of each node, used to tell which nodes need to be rewired
+    edge_signatures: Dict[int, Tuple[Tuple[int, str, Any], ...]]
+
+
+class EvoTable:
+    """Evolution facts about every monster in a graph, indexed by monster id.
+
+    These take a walk through the graph to work out, so they're computed once per monster when the
+    graph is built instead of on every call.
+    """
+    REVERSIBLE = 1
+    REINCARNATED = 2
+    NORMAL = 4
+    FIRST = 8
+    SECOND_ULTIMATE = 16
+
+    EVO_TYPES = list(InternalEvoType)
+
+    def __init__(self, size: int = 0):
+        # A base_id of -1 means that the monster hasn't been classified
+        self.base_id = array('l', [-1]) * size
+        self.transform_base = array('l', [-1]) * size
+        self.depth = array('d', [0]) * size
+        self.evo_type = array('b', [0]) * size
+        self.flags = array('B', [0]) * size
+
+    def __contains__(self, monster_id: int) -> bool:
+        return 0 <= monster_id < len(self.base_id) and self.base_id[monster_id] != -1
+
+    def resize(self, size: int) -> None:
+        extra = size - len(self.base_id)
+        if extra > 0:
+            self.base_id.extend([-1] * extra)
+            self.transform_base.extend([-1] * extra)
+            self.depth.extend([0] * extra)
+            self.evo_type.extend([0] * extra)
+            self.flags.extend([0] * extra)
+
+    def copy(self) -> "EvoTable":
+        table = EvoTable()
+        table.base_id = array('l', self.base_id)
+        table.transform_base = array('l', self.transform_base)
+        table.depth = array('d', self.depth)
+        table.evo_type = array('b', self.evo_type)
+        table.flags = array('B', self.flags)
+        return table
+
+    def has_flag(self, monster_id: int, flag: int) -> bool:
+        return bool(self.flags[monster_id] & flag)
+
+
+class EdgeIndex:
+    """The outgoing edges of every node in a graph, split up by edge type.
+
+    Evolution and transform lookups only ever want one type of edge, so this saves walking every edge of
+    a node and comparing type strings on each call.  It has to be kept in sync with the graph by calling
+    set_node whenever a node's outgoing edges change.
+    """
+
+    def __init__(self):
+        self._edges: Dict[str, Dict[int, Tuple[Tuple[int, Dict[str, Any]], ...]]] = defaultdict(dict)
+
+    @classmethod
+    def from_graph(cls, graph) -> "EdgeIndex":
+        index = cls()
+        for mid in graph.nodes:
+            index.set_node(mid, graph[mid])
+        return index
+
+    def set_node(self, monster_id: int, adjacency: Mapping[int, Mapping[int, Dict[str, Any]]]) -> None:
+        for edges in self._edges.values():
+            edges.pop(monster_id, None)
+        by_type = defaultdict(list)
+        for to_id, keydict in adjacency.items():
+            for attrs in keydict.values():
+                by_type[attrs.get('type')].append((to_id, attrs))
+        for etype, edges in by_type.items():
+            self._edges[etype][monster_id] = tuple(edges)
+
+    def get(self, monster_id: int, etype: str) -> Tuple[Tuple[int, Dict[str, Any]], ...]:
+        return self._edges[etype].get(monster_id, ()) if etype in self._edges else ()
+
+    def copy(self) -> "EdgeIndex":
+        index = EdgeIndex()
+        for etype, edges in self._edges.items():
+            index._edges[etype] = dict(edges)
+        return index
+
+
+def row_fingerprint(*rows: Any) -> bytes:
+    """A stable digest of database rows, used to tell which rows changed between reloads"""
+    return hashlib.blake2b(repr(rows).encode(), digest_size=16).digest()
+
+
+def build_server_data(database: DBCogDatabase, server: Server, debug_monster_ids: Optional[List[int]] = None,
+                      previous_fingerprints: Optional[Dict[int, bytes]] = None) -> ServerData:
+    """Build the models and edges for a server.
+
+    If previous_fingerprints is given, models are only built for monsters whose rows have changed
+    since those fingerprints were taken.
+    """
+    def debug_validate_id(monster_id: int) -> Optional[int]:
+        if debug_monster_ids is None or monster_id in debug_monster_ids:
+            return monster_id
 
-class MonsterGraph:
-    def __init__(self, database: DBCogDatabase, debug_monster_ids: Optional[List[int]] = None):
-        self.issues = []
-        self.debug_monster_ids = debug_monster_ids
-
-        self.database = database
-        self.max_monster_id = -1
-        self.graph_dict: Dict[Server, MultiDiGraph] = {
-            Server.COMBINED: self.build_graph(Server.COMBINED),
-            Server.NA: self.build_graph(Server.NA),
-        }
-
-        self._cache_graphs()
+    table_suffix = ""
+    where = ""
+    if server != Server.COMBINED:
+        table_suffix = "_" + server.value.lower()
+        where = SERVER_ID_WHERE_CONDITION.format(["JP", "NA", "KR"].index(server.value))
+
+    ms = database.query_many(MONSTER_QUERY.format(table_suffix))
+    es = database.query_many(EVOS_QUERY.format(table_suffix))
+    tfs = database.query_many(TRANSFORMS_QUERY.format(table_suffix))
+    aws = database.query_many(AWAKENINGS_QUERY.format(table_suffix))
+    ems = database.query_many(EGG_QUERY.format(table_suffix) + where)
+    exs = database.query_many(EXCHANGE_QUERY.format(table_suffix) + where)
+
+    as_query = database.query_many(ACTIVE_QUERY.format(table_suffix))
+    acts = {}
+    act_rows = defaultdict(list)
+    for row in as_query:
+        act_rows[row.active_skill_id].append(row)
+        if row.active_skill_id not in acts:
+            acts[row.active_skill_id] = {
+                'active_skill_id': row.active_skill_id,
+                'compound_skill_type_id': row.compound_skill_type_id,
+                'name_ja': row.act_name_ja,
+                'name_en': row.act_name_en,
+                'name_ko': row.act_name_ko,
+                'desc_ja': row.act_desc_ja,
+                'desc_en': row.act_desc_en,
+                'desc_ko': row.act_desc_ko,
+                'desc_templated_ja': row.act_desc_templated_ja,
+                'desc_templated_en': row.act_desc_templated_en,
+                'desc_templated_ko': row.act_desc_templated_ko,
+                'desc_official_ja': row.act_desc_official_ja,
+                'desc_official_ko': row.act_desc_official_ko,
+                'desc_official_en': row.act_desc_official_en,
+                'cooldown_turns_max': row.cooldown_turns_max,
+                'cooldown_turns_min': row.cooldown_turns_min,
+
+                'active_subskills': []
+            }
+        skill = acts[row.active_skill_id]
+        if len(skill['active_subskills']) <= row.subskill_idx:
+            skill['active_subskills'].append({
+                'active_subskill_id': row.active_subskill_id,
+                'name_ja': row.ass_name_ja,
+                'name_en': row.ass_name_en,
+                'name_ko': row.ass_name_ko,
+                'desc_ja': row.ass_desc_ja,
+                'desc_en': row.ass_desc_en,
+                'desc_ko': row.ass_desc_ko,
+                'desc_templated_ja': row.ass_desc_templated_ja,
+                'desc_templated_en': row.ass_desc_templated_en,
+                'desc_templated_ko': row.ass_desc_templated_ko,
+                'board_65': row.ass_board_65,
+                'board_76': row.ass_board_76,
+                'cooldown': row.ass_cooldown,
+
+                'active_parts': []
+            })
+        subskill = skill['active_subskills'][row.subskill_idx]
+        subskill['active_parts'].append({
+            'active_part_id': row.active_part_id,
+            'active_skill_type_id': row.active_skill_type_id,
+            'desc_ja': row.ap_desc_ja,
+            'desc_en': row.ap_desc_en,
+            'desc_ko': row.ap_desc_ko,
+            'desc_templated_ja': row.ap_desc_templated_ja,
+            'desc_templated_en': row.ap_desc_templated_en,
+            'desc_templated_ko': row.ap_desc_templated_ko,
+        })
+    built_acts = {}
+
+    def get_active_skill(active_skill_id: int) -> Optional[ActiveSkillModel]:
+        if active_skill_id not in acts:
+            return None
+        if active_skill_id not in built_acts:
+            built_acts[active_skill_id] = ActiveSkillModel(**acts[active_skill_id])
+        return built_acts[active_skill_id]
+
+    mtoawo_rows = defaultdict(list)
+    for a in aws:
+        mtoawo_rows[a.monster_id].append(a)
+
+    mtoegg = defaultdict(lambda: {'pem': False, 'rem': False, 'adpem': False})
+    for e in ems:
+        data = json.loads(e.contents)
+        e_type = 'pem' if e.type == "PEM" else 'adpem' if e.type == "VEM" else 'rem'
+        for m in data:
+            idx = int(m[1:-1])  # Remove parentheses
+            mtoegg[idx][e_type] = True
+
+    ss_query = database.query_many(SIMPLE_QUERY.format('series'))
+    series = {}
+    series_rows = {}
+    for row in ss_query:
+        series_rows[row.series_id] = row
+        series[row.series_id] = SeriesModel(series_id=row.series_id,
+                                            name_ja=row.name_ja,
+                                            name_en=row.name_en,
+                                            name_ko=row.name_ko,
+                                            series_type=row.series_type
+                                            )
+
+    mss_query = database.query_many(SIMPLE_QUERY.format('monster_series'))
+    monster_series = defaultdict(set)
+    monster_series_ids = defaultdict(set)
+    for row in mss_query:
+        monster_series[row.monster_id].add(series[row.series_id])
+        monster_series_ids[row.monster_id].add(row.series_id)
+
+    models = {}
+    fingerprints = {}
+    edges = []
+    interner = ModelInterner()
+    for m in ms:
+        if debug_monster_ids is not None and m.monster_id not in debug_monster_ids:
+            continue
+
+        fingerprint = row_fingerprint(m,
+                                      mtoawo_rows[m.monster_id],
+                                      act_rows[m.active_skill_id],
+                                      [series_rows[sid] for sid in sorted(monster_series_ids[m.monster_id])],
+                                      series_rows.get(m.s_series_id),
+                                      mtoegg[m.monster_id])
+        fingerprints[m.monster_id] = fingerprint
+
+        if m.evo_gem_id:
+            if debug_monster_ids is None or m.evo_gem_id in debug_monster_ids:
+                edges.append((m.monster_id, m.evo_gem_id, {'type': 'evo_gem_from'}, None))
+                edges.append((m.evo_gem_id, m.monster_id, {'type': 'evo_gem_of'}, None))
+
+        if previous_fingerprints is not None and previous_fingerprints.get(m.monster_id) == fingerprint:
+            continue
+
+        ls_model = LeaderSkillModel(leader_skill_id=m.leader_skill_id,
+                                    name_ja=m.ls_name_ja,
+                                    name_en=m.ls_name_en,
+                                    name_ko=m.ls_name_ko,
+                                    desc_ja=m.ls_desc_ja,
+                                    desc_en=m.ls_desc_en,
+                                    desc_ko=m.ls_desc_ko,
+                                    max_hp=m.max_hp,
+                                    max_atk=m.max_atk,
+                                    max_rcv=m.max_rcv,
+                                    max_shield=m.max_shield,
+                                    max_combos=m.max_combos,
+                                    bonus_damage=m.bonus_damage,
+                                    mult_bonus_damage=m.mult_bonus_damage,
+                                    extra_time=m.extra_time,
+                                    tags=m.tags,
+                                    ) if m.leader_skill_id != 0 else None
+
+        awakenings = []
+        for a in mtoawo_rows[m.monster_id]:
+            awoken_skill_model = AwokenSkillModel(**a)
+            awakenings.append(AwakeningModel(awoken_skill_model=awoken_skill_model, **a))
+
+        m_model = MonsterModel(monster_id=m.monster_id,
+                               base_evo_id=m.base_id,
+                               monster_no_jp=m.monster_no_jp,
+                               monster_no_na=m.monster_no_na,
+                               monster_no_kr=m.monster_no_kr,
+                               name_is_translation=m.is_translation,
+                               awakenings=awakenings,
+                               leader_skill=ls_model,
+                               active_skill=get_active_skill(m.active_skill_id),
+                               series=series[m.s_series_id],
+                               all_series=monster_series[m.monster_id] or {series[0]},
+                               series_id=m.s_series_id,
+                               group_id=m.group_id,
+                               collab_id=m.collab_id,
+                               attribute_1_id=m.attribute_1_id,
+                               attribute_2_id=m.attribute_2_id,
+                               attribute_3_id=m.attribute_3_id,
+                               name_ja=m.name_ja,
+                               name_en=m.name_en,
+                               name_ko=m.name_ko,
+                               name_en_override=m.name_override,
+                               rarity=m.rarity,
+                               is_farmable=m.drop_id is not None,
+                               in_pem=mtoegg[m.monster_id]['pem'],
+                               in_rem=mtoegg[m.monster_id]['rem'],
+                               in_vem=mtoegg[m.monster_id]['adpem'],
+                               buy_mp=m.buy_mp,
+                               sell_mp=m.sell_mp,
+                               sell_gold=m.sell_gold,
+                               reg_date=m.reg_date,
+                               on_jp=m.on_jp == 1,
+                               on_na=m.on_na == 1,
+                               on_kr=m.on_kr == 1,
+                               type_1_id=m.type_1_id,
+                               type_2_id=m.type_2_id,
+                               type_3_id=m.type_3_id,
+                               is_inheritable=m.inheritable == 1,
+                               is_stackable=m.stackable == 1,
+                               evo_gem_id=m.evo_gem_id,
+                               orb_skin_id=m.orb_skin_id,
+                               bgm_id=m.bgm_id,
+                               cost=m.cost,
+                               level=m.level,
+                               exp=m.exp,
+                               fodder_exp=m.fodder_exp,
+                               limit_mult=m.limit_mult,
+                               voice_id_jp=m.voice_id_jp,
+                               voice_id_na=m.voice_id_na,
+                               hp_max=m.hp_max,
+                               hp_min=m.hp_min,
+                               hp_scale=m.hp_scale,
+                               atk_max=m.atk_max,
+                               atk_min=m.atk_min,
+                               atk_scale=m.atk_scale,
+                               rcv_max=m.rcv_max,
+                               rcv_min=m.rcv_min,
+                               rcv_scale=m.rcv_scale,
+                               latent_slots=m.latent_slots,
+                               has_animation=m.has_animation == 1,
+                               has_hqimage=m.has_hqimage == 1,
+                               server_priority=server,
+                               drop_id=m.drop_id,
+                               mp4_size=m.mp4_size,
+                               gif_size=m.gif_size,
+                               hq_png_size=m.hq_png_size,
+                               hq_gif_size=m.hq_gif_size,
+                               icon_cachebreak=ICON_CACHEBREAKS.get(m.monster_id)
+                               )
+        if not m_model:
+            continue
+
+        interner.intern_monster(m_model)
+        models[m.monster_id] = m_model
+
+    for e in es:
+        if debug_monster_ids is not None:
+            if e.from_id not in debug_monster_ids or e.to_id not in debug_monster_ids:
+                continue
 
-    def build_graph(self, server: Server) -> MultiDiGraph:
-        graph = MultiDiGraph()
+        evo_model = EvolutionModel(
+            evolution_type=e.evolution_type,
+            reversible=e.reversible,
+            from_id=e.from_id,
+            to_id=e.to_id,
+            mat_1_id=debug_validate_id(e.mat_1_id),
+            mat_2_id=debug_validate_id(e.mat_2_id),
+            mat_3_id=debug_validate_id(e.mat_3_id),
+            mat_4_id=debug_validate_id(e.mat_4_id),
+            mat_5_id=debug_validate_id(e.mat_5_id),
+            tstamp=e.tstamp,
+        )
+        fingerprint = row_fingerprint(e)
 
-        table_suffix = ""
-        where = ""
-        if server != Server.COMBINED:
-            table_suffix = "_" + server.value.lower()
-            where = SERVER_ID_WHERE_CONDITION.format(["JP", "NA", "KR"].index(server.value))
-
-        ms = self.database.query_many(MONSTER_QUERY.format(table_suffix))
-        es = self.database.query_many(EVOS_QUERY.format(table_suffix))
-        tfs = self.database.query_many(TRANSFORMS_QUERY.format(table_suffix))
-        aws = self.database.query_many(AWAKENINGS_QUERY.format(table_suffix))
-        ems = self.database.query_many(EGG_QUERY.format(table_suffix) + where)
-        exs = self.database.query_many(EXCHANGE_QUERY.format(table_suffix) + where)
-
-        as_query = self.database.query_many(ACTIVE_QUERY.format(table_suffix))
-        acts = {}
-        for row in as_query:
-            if row.active_skill_id not in acts:
-                acts[row.active_skill_id] = {
-                    'active_skill_id': row.active_skill_id,
-                    'compound_skill_type_id': row.compound_skill_type_id,
-                    'name_ja': row.act_name_ja,
-                    'name_en': row.act_name_en,
-                    'name_ko': row.act_name_ko,
-                    'desc_ja': row.act_desc_ja,
-                    'desc_en': row.act_desc_en,
-                    'desc_ko': row.act_desc_ko,
-                    'desc_templated_ja': row.act_desc_templated_ja,
-                    'desc_templated_en': row.act_desc_templated_en,
-                    'desc_templated_ko': row.act_desc_templated_ko,
-                    'desc_official_ja': row.act_desc_official_ja,
-                    'desc_official_ko': row.act_desc_official_ko,
-                    'desc_official_en': row.act_desc_official_en,
-                    'cooldown_turns_max': row.cooldown_turns_max,
-                    'cooldown_turns_min': row.cooldown_turns_min,
-
-                    'active_subskills': []
-                }
-            skill = acts[row.active_skill_id]
-            if len(skill['active_subskills']) <= row.subskill_idx:
-                skill['active_subskills'].append({
-                    'active_subskill_id': row.active_subskill_id,
-                    'name_ja': row.ass_name_ja,
-                    'name_en': row.ass_name_en,
-                    'name_ko': row.ass_name_ko,
-                    'desc_ja': row.ass_desc_ja,
-                    'desc_en': row.ass_desc_en,
-                    'desc_ko': row.ass_desc_ko,
-                    'desc_templated_ja': row.ass_desc_templated_ja,
-                    'desc_templated_en': row.ass_desc_templated_en,
-                    'desc_templated_ko': row.ass_desc_templated_ko,
-                    'board_65': row.ass_board_65,
-                    'board_76': row.ass_board_76,
-                    'cooldown': row.ass_cooldown,
-
-                    'active_parts': []
-                })
-            subskill = skill['active_subskills'][row.subskill_idx]
-            subskill['active_parts'].append({
-                'active_part_id': row.active_part_id,
-                'active_skill_type_id': row.active_skill_type_id,
-                'desc_ja': row.ap_desc_ja,
-                'desc_en': row.ap_desc_en,
-                'desc_ko': row.ap_desc_ko,
-                'desc_templated_ja': row.ap_desc_templated_ja,
-                'desc_templated_en': row.ap_desc_templated_en,
-                'desc_templated_ko': row.ap_desc_templated_ko,
-            })
-        acts = {asid: ActiveSkillModel(**act) for asid, act in acts.items()}
+        edges.append((evo_model.from_id, evo_model.to_id,
+                      {'type': 'evolution', 'model': evo_model}, fingerprint))
+        edges.append((evo_model.to_id, evo_model.from_id,
+                      {'type': 'back_evolution', 'model': evo_model}, fingerprint))
 
-        mtoawo = defaultdict(list)
-        for a in aws:
-            awoken_skill_model = AwokenSkillModel(**a)
-            awakening_model = AwakeningModel(awoken_skill_model=awoken_skill_model, **a)
-            mtoawo[a.monster_id].append(awakening_model)
-
-        mtoegg = defaultdict(lambda: {'pem': False, 'rem': False, 'adpem': False})
-        for e in ems:
-            data = json.loads(e.contents)
-            e_type = 'pem' if e.type == "PEM" else 'adpem' if e.type == "VEM" else 'rem'
-            for m in data:
-                idx = int(m[1:-1])  # Remove parentheses
-                mtoegg[idx][e_type] = True
-
-        ss_query = self.database.query_many(SIMPLE_QUERY.format('series'))
-        series = {}
-        for row in ss_query:
-            series[row.series_id] = SeriesModel(series_id=row.series_id,
-                                                name_ja=row.name_ja,
-                                                name_en=row.name_en,
-                                                name_ko=row.name_ko,
-                                                series_type=row.series_type
-                                                )
-
-        mss_query = self.database.query_many(SIMPLE_QUERY.format('monster_series'))
-        monster_series = defaultdict(set)
-        for row in mss_query:
-            monster_series[row.monster_id].add(series[row.series_id])
-
-        for m in ms:
-            if self.debug_monster_ids is not None and m.monster_id not in self.debug_monster_ids:
+        # for material_of queries
+        already_used_in_this_evo = set()  # don't add same mat more than once per evo
+        for mat in evo_model.mats:
+            if mat in already_used_in_this_evo:
                 continue
-            ls_model = LeaderSkillModel(leader_skill_id=m.leader_skill_id,
-                                        name_ja=m.ls_name_ja,
-                                        name_en=m.ls_name_en,
-                                        name_ko=m.ls_name_ko,
-                                        desc_ja=m.ls_desc_ja,
-                                        desc_en=m.ls_desc_en,
-                                        desc_ko=m.ls_desc_ko,
-                                        max_hp=m.max_hp,
-                                        max_atk=m.max_atk,
-                                        max_rcv=m.max_rcv,
-                                        max_shield=m.max_shield,
-                                        max_combos=m.max_combos,
-                                        bonus_damage=m.bonus_damage,
-                                        mult_bonus_damage=m.mult_bonus_damage,
-                                        extra_time=m.extra_time,
-                                        tags=m.tags,
-                                        ) if m.leader_skill_id != 0 else None
-
-            m_model = MonsterModel(monster_id=m.monster_id,
-                                   base_evo_id=m.base_id,
-                                   monster_no_jp=m.monster_no_jp,
-                                   monster_no_na=m.monster_no_na,
-                                   monster_no_kr=m.monster_no_kr,
-                                   name_is_translation=m.is_translation,
-                                   awakenings=mtoawo[m.monster_id],
-                                   leader_skill=ls_model,
-                                   active_skill=acts.get(m.active_skill_id),
-                                   series=series[m.s_series_id],
-                                   all_series=monster_series[m.monster_id] or {series[0]},
-                                   series_id=m.s_series_id,
-                                   group_id=m.group_id,
-                                   collab_id=m.collab_id,
-                                   attribute_1_id=m.attribute_1_id,
-                                   attribute_2_id=m.attribute_2_id,
-                                   attribute_3_id=m.attribute_3_id,
-                                   name_ja=m.name_ja,
-                                   name_en=m.name_en,
-                                   name_ko=m.name_ko,
-                                   name_en_override=m.name_override,
-                                   rarity=m.rarity,
-                                   is_farmable=m.drop_id is not None,
-                                   in_pem=mtoegg[m.monster_id]['pem'],
-                                   in_rem=mtoegg[m.monster_id]['rem'],
-                                   in_vem=mtoegg[m.monster_id]['adpem'],
-                                   buy_mp=m.buy_mp,
-                                   sell_mp=m.sell_mp,
-                                   sell_gold=m.sell_gold,
-                                   reg_date=m.reg_date,
-                                   on_jp=m.on_jp == 1,
-                                   on_na=m.on_na == 1,
-                                   on_kr=m.on_kr == 1,
-                                   type_1_id=m.type_1_id,
-                                   type_2_id=m.type_2_id,
-                                   type_3_id=m.type_3_id,
-                                   is_inheritable=m.inheritable == 1,
-                                   is_stackable=m.stackable == 1,
-                                   evo_gem_id=m.evo_gem_id,
-                                   orb_skin_id=m.orb_skin_id,
-                                   bgm_id=m.bgm_id,
-                                   cost=m.cost,
-                                   level=m.level,
-                                   exp=m.exp,
-                                   fodder_exp=m.fodder_exp,
-                                   limit_mult=m.limit_mult,
-                                   voice_id_jp=m.voice_id_jp,
-                                   voice_id_na=m.voice_id_na,
-                                   hp_max=m.hp_max,
-                                   hp_min=m.hp_min,
-                                   hp_scale=m.hp_scale,
-                                   atk_max=m.atk_max,
-                                   atk_min=m.atk_min,
-                                   atk_scale=m.atk_scale,
-                                   rcv_max=m.rcv_max,
-                                   rcv_min=m.rcv_min,
-                                   rcv_scale=m.rcv_scale,
-                                   latent_slots=m.latent_slots,
-                                   has_animation=m.has_animation == 1,
-                                   has_hqimage=m.has_hqimage == 1,
-                                   server_priority=server,
-                                   drop_id=m.drop_id,
-                                   mp4_size=m.mp4_size,
-                                   gif_size=m.gif_size,
-                                   hq_png_size=m.hq_png_size,
-                                   hq_gif_size=m.hq_gif_size,
-                                   icon_cachebreak=ICON_CACHEBREAKS.get(m.monster_id)
-                                   )
-            if not m_model:
+            edges.append((mat, evo_model.to_id, {'type': 'material_of', 'model': evo_model}, fingerprint))
+            already_used_in_this_evo.add(mat)
+
+    for tf in tfs:
+        if debug_monster_ids is not None:
+            if tf.from_monster_id not in debug_monster_ids or tf.to_monster_id not in debug_monster_ids:
                 continue
 
-            graph.add_node(m.monster_id, model=m_model)
-            self.max_monster_id = max(self.max_monster_id, m.monster_id)
+        # Make a model with percentages here.
 
-            if m.evo_gem_id:
-                if self.debug_monster_ids is None or m.evo_gem_id in self.debug_monster_ids:
-                    graph.add_edge(m.monster_id, m.evo_gem_id, type='evo_gem_from')
-                    graph.add_edge(m.evo_gem_id, m.monster_id, type='evo_gem_of')
+        edges.append((tf.from_monster_id, tf.to_monster_id, {'type': 'transformation'}, None))
+        edges.append((tf.to_monster_id, tf.from_monster_id, {'type': 'back_transformation'}, None))
 
-        for e in es:
-            if self.debug_monster_ids is not None:
-                if e.from_id not in self.debug_monster_ids or e.to_id not in self.debug_monster_ids:
+    exchanges = defaultdict(set)
+    exchange_fingerprints = defaultdict(set)
+    for ex in exs:
+        model = ExchangeModel(**ex)
+        fingerprint = row_fingerprint(ex)
+        for vendor_id in re.findall(r'\d+', ex.required_monster_ids):
+            if debug_monster_ids is not None:
+                if ex.target_monster_id not in debug_monster_ids \
+                        or int(vendor_id) not in debug_monster_ids:
                     continue
+            exchanges[(int(vendor_id), ex.target_monster_id)].add(model)
+            exchange_fingerprints[(int(vendor_id), ex.target_monster_id)].add(fingerprint)
+    for (sell_id, buy_id), models_ in exchanges.items():
+        fingerprint = tuple(sorted(exchange_fingerprints[(sell_id, buy_id)]))
+        edges.append((buy_id, sell_id, {'type': 'exchange_from', 'models': models_}, fingerprint))
+        edges.append((sell_id, buy_id, {'type': 'exchange_for', 'models': models_}, fingerprint))
 
-            evo_model = EvolutionModel(
-                evolution_type=e.evolution_type,
-                reversible=e.reversible,
-                from_id=e.from_id,
-                to_id=e.to_id,
-                mat_1_id=self.debug_validate_id(e.mat_1_id),
-                mat_2_id=self.debug_validate_id(e.mat_2_id),
-                mat_3_id=self.debug_validate_id(e.mat_3_id),
-                mat_4_id=self.debug_validate_id(e.mat_4_id),
-                mat_5_id=self.debug_validate_id(e.mat_5_id),
-                tstamp=e.tstamp,
-            )
-
-            graph.add_edge(evo_model.from_id, evo_model.to_id, type='evolution', model=evo_model)
-            graph.add_edge(evo_model.to_id, evo_model.from_id, type='back_evolution', model=evo_model)
-
-            # for material_of queries
-            already_used_in_this_evo = set()  # don't add same mat more than once per evo
-            for mat in evo_model.mats:
-                if mat in already_used_in_this_evo:
-                    continue
-                graph.add_edge(
-                    mat, evo_model.to_id, type="material_of", model=evo_model)
-                already_used_in_this_evo.add(mat)
+    edge_signatures = defaultdict(list)
+    for from_id, to_id, attrs, fingerprint in edges:
+        edge_signatures[from_id].append((to_id, attrs['type'], fingerprint))
+    edge_signatures = {mid: tuple(sorted(sig, key=repr)) for mid, sig in edge_signatures.items()}
+
+    return ServerData(models, fingerprints, edges, edge_signatures)
 
-        for tf in tfs:
-            if self.debug_monster_ids is not None:
-                if tf.from_monster_id not in self.debug_monster_ids or tf.to_monster_id not in self.debug_monster_ids:
-                    continue
 
-            # Make a model with percentages here.
+def build_server_data_from_file(data_file: str, server: Server, debug_monster_ids: Optional[List[int]] = None,
+                                previous_fingerprints: Optional[Dict[int, bytes]] = None) -> ServerData:
+    """Build a server's data over its own read-only connection so that servers can be built in parallel"""
+    database = DBCogDatabase(data_file, read_only=True)
+    try:
+        return build_server_data(database, server, debug_monster_ids, previous_fingerprints)
+    finally:
+        database.close()
+
+
+class MonsterGraph:
+    def __init__(self, database: DBCogDatabase, debug_monster_ids: Optional[List[int]] = None, *,
+                 parallel: bool = True):
+        self.issues = []
+        self.debug_monster_ids = debug_monster_ids
+        self.parallel = parallel
+
+        self.database = database
+        self.max_monster_id = -1
+        self._fingerprints: Dict[Server, Dict[int, bytes]] = {}
+        self._edge_signatures: Dict[Server, Dict[int, Tuple[Tuple[int, str, Any], ...]]] = {}
+        self._evo_tables: Dict[Server, EvoTable] = {}
+        self._edge_indexes: Dict[Server, EdgeIndex] = {}
+        self._ordered_monsters: Dict[Server, Tuple[MonsterModel, ...]] = {}
+        self._monster_ordinals: Dict[Server, Dict[int, int]] = {}
+        self.graph_dict: Dict[Server, Union[MultiDiGraph, OverlayGraph]] = {}
+        server_data = self._build_all_server_data()
+        self._intern_models(server_data)
+        for server in GRAPH_SERVERS:
+            if server in OVERLAY_SERVERS:
+                self.graph_dict[server] = self.build_overlay(server, OVERLAY_SERVERS[server], server_data[server])
+            else:
+                self.graph_dict[server] = self.build_graph(server, server_data[server])
+        for server, graph in self.graph_dict.items():
+            self._edge_indexes[server] = EdgeIndex.from_graph(graph)
 
-            graph.add_edge(tf.from_monster_id, tf.to_monster_id, type='transformation')
-            graph.add_edge(tf.to_monster_id, tf.from_monster_id, type='back_transformation')
+        self._cache_graphs()
+        for server, graph in self.graph_dict.items():
+            self._classify_evos(server, graph.nodes)
+        self._number_monsters()
+
+    def __getstate__(self):
+        # The database connection can't be pickled.  It's reattached by load_database.
+        state = self.__dict__.copy()
+        state['database'] = None
+        return state
+
+    def _build_all_server_data(self, previous_fingerprints: Optional[Dict[Server, Dict[int, bytes]]] = None) \
+            -> Dict[Server, ServerData]:
+        """Build the data for every graph, one process per server if possible.
+
+        Model construction is CPU bound, so threads wouldn't help here.  Each worker opens its own
+        read-only connection to the database file and sends back the built models.
+        """
+        if previous_fingerprints is None:
+            previous_fingerprints = {}
+
+        if self.parallel and self.database.data_file is not None:
+            try:
+                # Red loads cogs without putting them on sys.path, so a spawned worker couldn't import this
+                # package to unpickle build_server_data_from_file.  The initializer has to come from the
+                # standard library for the same reason.
+                with ProcessPoolExecutor(max_workers=len(GRAPH_SERVERS),
+                                         mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=site.addsitedir, initargs=(COG_PARENT_DIR,)) as pool:
+                    futures = {server: pool.submit(build_server_data_from_file, self.database.data_file, server,
+                                                   self.debug_monster_ids, previous_fingerprints.get(server))
+                               for server in GRAPH_SERVERS}
+                    return {server: future.result() for server, future in futures.items()}
+            except Exception:
+                # Whatever went wrong in the workers (a broken pool, a pickling error, ...), the serial build
+                # either works or raises the real error
+                logger.exception("Parallel graph build failed.  Building serially instead.")
+
+        return {server: build_server_data(self.database, server, self.debug_monster_ids,
+                                          previous_fingerprints.get(server))
+                for server in GRAPH_SERVERS}
+
+    def _intern_models(self, server_data: Dict[Server, ServerData]) -> None:
+        """Share identical series and skill models between newly built monsters and the existing graphs"""
+        interner = ModelInterner()
+        for graph in self.graph_dict.values():
+            for node in graph.nodes.values():
+                if 'model' in node:
+                    interner.seed_monster(node['model'])
+        for data in server_data.values():
+            for m_model in data.models.values():
+                interner.intern_monster(m_model)
+
+    def build_graph(self, server: Server, data: Optional[ServerData] = None) -> MultiDiGraph:
+        graph = MultiDiGraph()
 
-        exchanges = defaultdict(set)
-        for ex in exs:
-            model = ExchangeModel(**ex)
-            for vendor_id in re.findall(r'\d+', ex.required_monster_ids):
-                if self.debug_monster_ids is not None:
-                    if ex.target_monster_id not in self.debug_monster_ids \
-                            or int(vendor_id) not in self.debug_monster_ids:
-                        continue
-                exchanges[(int(vendor_id), ex.target_monster_id)].add(model)
-        for (sell_id, buy_id), models in exchanges.items():
-            graph.add_edge(buy_id, sell_id, type='exchange_from', models=models)
-            graph.add_edge(sell_id, buy_id, type='exchange_for', models=models)
+        if data is None:
+            data = build_server_data(self.database, server, self.debug_monster_ids)
+        for mid, m_model in data.models.items():
+            graph.add_node(mid, model=m_model)
+            self.max_monster_id = max(self.max_monster_id, mid)
+        for from_id, to_id, attrs, _ in data.edges:
+            graph.add_edge(from_id, to_id, **attrs)
 
+        self._fingerprints[server] = data.fingerprints
+        self._edge_signatures[server] = data.edge_signatures
         return graph
 
+    def build_overlay(self, server: Server, base_server: Server, data: ServerData) -> OverlayGraph:
+        """Build a server's graph as an overlay that only stores the edges that differ from the base server's.
+
+        The server's models are all kept, since they're built per server.  Sharing the edges takes an extra
+        pass over the edge signatures, so this saves memory but not build time.
+        """
+        overlay = OverlayGraph(self.graph_dict[base_server])
+
+        for mid, m_model in data.models.items():
+            overlay.add_node(mid, model=m_model)
+            self.max_monster_id = max(self.max_monster_id, mid)
+        for from_id, to_id, _, _ in data.edges:
+            overlay.add_node(from_id)
+            overlay.add_node(to_id)
+
+        self._fingerprints[server] = data.fingerprints
+        self._edge_signatures[server] = data.edge_signatures
+        self._share_overlay_edges(server)
+        overridden = overlay.overridden
+        for from_id, to_id, attrs, _ in data.edges:
+            if from_id in overridden:
+                overlay.add_edge(from_id, to_id, **attrs)
+        return overlay
+
+    def _share_overlay_edges(self, server: Server) -> None:
+        """Drop the overlay's own copy of any edges that match its base graph's again"""
+        own_signatures = self._edge_signatures[server]
+        base_signatures = self._edge_signatures[OVERLAY_SERVERS[server]]
+        self.graph_dict[server].share(mid for mid in self.graph_dict[server].overridden
+                                      if own_signatures.get(mid) == base_signatures.get(mid))
+
+    def _number_monsters(self) -> None:
+        """Order every server's monsters by id, for the indexes that store monsters as ints.
+
+        The dicts are replaced rather than updated, so copies of this graph can keep sharing them.
+        """
+        self._ordered_monsters = {}
+        self._monster_ordinals = {}
+        for server in GRAPH_SERVERS:
+            monsters = tuple(sorted(self.get_all_monsters(server), key=lambda m: m.monster_id))
+            self._ordered_monsters[server] = monsters
+            self._monster_ordinals[server] = {m.monster_id: ordinal for ordinal, m in enumerate(monsters)}
+
     def _cache_graphs(self) -> None:
         for server in self.graph_dict:
             for mid in self.graph_dict[server].nodes:
@@ -442,17 +748,177 @@ class MonsterGraph:
                     if self.debug_monster_ids is not None:
                         self.graph_dict[server].nodes[mid]['model'].base_evo_id = alt_ids[0]
                 else:
-                    alert = False
-                    for edges in self.graph_dict[server][mid].values():
-                        for edge in edges.values():
-                            if not edge['type'].startswith('exchange'):
-                                alert |= True
-                    if alert:
-                        self.issues.append(f"{mid} has no model in the {server.name} graph.")
+                    self._check_modelless_node(server, mid)
+
+    def _classify_evos(self, server: Server, monster_ids: Iterable[int]) -> None:
+        table = self._evo_tables.setdefault(server, EvoTable())
+        table.resize(max(self.graph_dict[server].nodes, default=-1) + 1)
+        monsters = []
+        for mid in monster_ids:
+            if 0 <= mid < len(table.base_id):
+                table.base_id[mid] = -1
+            if (monster := self.get_monster(mid, server=server)) is not None:
+                monsters.append(monster)
+
+        for monster in monsters:
+            mid = monster.monster_id
+            flags = 0
+            if self._is_reversible_evo(monster):
+                flags |= EvoTable.REVERSIBLE
+            if self._is_reincarnated(monster):
+                flags |= EvoTable.REINCARNATED
+            if self._is_first_evo(monster):
+                flags |= EvoTable.FIRST
+            if self._is_second_ultimate(monster):
+                flags |= EvoTable.SECOND_ULTIMATE
+            base_id = self._find_base_id(monster)
+            if not (flags & (EvoTable.REVERSIBLE | EvoTable.REINCARNATED) or base_id == mid):
+                flags |= EvoTable.NORMAL
+
+            table.flags[mid] = flags
+            table.transform_base[mid] = self._find_transform_base(monster).monster_id
+            table.depth[mid] = self._find_monster_depth(monster)
+            table.evo_type[mid] = EvoTable.EVO_TYPES.index(self._find_true_evo_type(monster))
+            # Set this last, because it marks the monster as classified
+            table.base_id[mid] = base_id
+
+    def _evo_table(self, monster: MonsterModel) -> Optional[EvoTable]:
+        table = self._evo_tables.get(monster.server_priority)
+        if table is not None and monster.monster_id in table:
+            return table
+        return None
+
+    def _check_modelless_node(self, server: Server, mid: int) -> None:
+        alert = False
+        for edges in self.graph_dict[server][mid].values():
+            for edge in edges.values():
+                if not edge['type'].startswith('exchange'):
+                    alert |= True
+        if alert:
+            self.issues.append(f"{mid} has no model in the {server.name} graph.")
+
+    def copy(self) -> "MonsterGraph":
+        """A copy of this graph that can be refreshed without affecting lookups on the original.
+
+        The graphs and their attribute dicts are copied, but the models themselves are shared.
+        """
+        graph = MonsterGraph.__new__(MonsterGraph)
+        graph.__dict__.update(self.__dict__)
+        graph.issues = list(self.issues)
+        graph.graph_dict = {}
+        for server in GRAPH_SERVERS:
+            if server in OVERLAY_SERVERS:
+                base = graph.graph_dict[OVERLAY_SERVERS[server]]
+                graph.graph_dict[server] = self.graph_dict[server].copy(base=base)
+            else:
+                graph.graph_dict[server] = self.graph_dict[server].copy()
+        graph._fingerprints = dict(self._fingerprints)
+        graph._edge_signatures = dict(self._edge_signatures)
+        graph._evo_tables = {server: table.copy() for server, table in self._evo_tables.items()}
+        graph._edge_indexes = {server: index.copy() for server, index in self._edge_indexes.items()}
+        return graph
+
+    def refresh(self) -> Optional[Dict[Server, Set[int]]]:
+        """Patch the graphs in place to match the current database.
+
+        Only monsters whose rows changed get new models, and only nodes whose edges changed are
+        rewired.  Returns the ids of every monster whose model, edges, or evo tree changed, or None
+        if the graphs can't be refreshed and must be rebuilt from scratch.
+        """
+        if self.debug_monster_ids is not None or set(self._fingerprints) != set(self.graph_dict):
+            return None
+
+        server_data = self._build_all_server_data(self._fingerprints)
+        self._intern_models(server_data)
+        # Overlays keep the edges they have now while their base is rewired under them
+        for server, base_server in OVERLAY_SERVERS.items():
+            old_signatures = self._edge_signatures[base_server]
+            new_signatures = server_data[base_server].edge_signatures
+            self.graph_dict[server].detach(mid for mid in set(old_signatures).union(new_signatures)
+                                           if old_signatures.get(mid) != new_signatures.get(mid))
+        changed = {server: self._refresh_graph(server, server_data[server]) for server in GRAPH_SERVERS}
+        for server in OVERLAY_SERVERS:
+            self._share_overlay_edges(server)
+
+        self.issues = []
+        self.max_monster_id = -1
+        for server, graph in self.graph_dict.items():
+            for mid, node in graph.nodes.items():
+                if 'model' in node:
+                    self.max_monster_id = max(self.max_monster_id, mid)
+                else:
+                    self._check_modelless_node(server, mid)
+        self._number_monsters()
+        return changed
+
+    def _refresh_graph(self, server: Server, data: ServerData) -> Set[int]:
+        graph = self.graph_dict[server]
+        old_signatures = self._edge_signatures[server]
+
+        touched = set(data.models)
+        for mid, m_model in data.models.items():
+            graph.add_node(mid, model=m_model)
+
+        edges_by_source = defaultdict(list)
+        for from_id, to_id, attrs, _ in data.edges:
+            edges_by_source[from_id].append((to_id, attrs))
+        for mid in set(old_signatures).union(data.edge_signatures):
+            if old_signatures.get(mid) == data.edge_signatures.get(mid):
+                continue
+            touched.add(mid)
+            if mid in graph:
+                touched.update(graph.successors(mid))
+                graph.remove_edges_from(list(graph.out_edges(mid, keys=True)))
+            for to_id, attrs in edges_by_source[mid]:
+                graph.add_edge(mid, to_id, **attrs)
+                touched.add(to_id)
+            self._edge_indexes[server].set_node(mid, graph[mid] if mid in graph else {})
+
+        removed = set(self._fingerprints[server]).difference(data.fingerprints)
+        touched.update(removed)
+
+        # Every tree that a touched monster was in or is now in needs its alt versions recalculated
+        dirty = set()
+        for mid in touched:
+            if mid in graph:
+                dirty.add(mid)
+                dirty.update(graph.nodes[mid].get('alt_versions', ()))
+        for mid in removed:
+            if mid in graph:
+                del graph.nodes[mid]['model']
+                graph.nodes[mid].pop('alt_versions', None)
+        for mid in list(dirty):
+            if mid in graph and 'model' not in graph.nodes[mid] and graph.degree(mid) == 0:
+                graph.remove_node(mid)
+
+        # Alt versions are ordered by base id and evo type, so every monster in the affected trees has to be
+        # classified again before they can be recalculated
+        changed = self._evo_tree_closure(server, dirty) | removed
+        self._classify_evos(server, changed)
+        for mid in changed:
+            if self.get_monster(mid, server=server):
+                graph.nodes[mid]['alt_versions'] = self.process_alt_ids(self.get_monster(mid, server=server))
+
+        self._fingerprints[server] = data.fingerprints
+        self._edge_signatures[server] = data.edge_signatures
+        return changed
+
+    def _evo_tree_closure(self, server: Server, monster_ids: Iterable[int]) -> Set[int]:
+        """The given monsters and everything that's in an evo tree with them, following the current edges"""
+        index = self._edge_indexes[server]
+        closure = set()
+        to_check = list(monster_ids)
+        while to_check:
+            mid = to_check.pop()
+            if mid in closure:
+                continue
+            closure.add(mid)
+            for etype in TREE_EDGE_TYPES:
+                to_check.extend(to_id for to_id, _ in index.get(mid, etype))
+        return closure
 
     def _get_edges(self, monster: MonsterModel, etype) -> Set[int]:
-        return {mid for mid, atlas in self.graph_dict[monster.server_priority][monster.monster_id].items()
-                for edge in atlas.values() if edge.get('type') == etype}
+        return {to_id for to_id, _ in self._edge_indexes[monster.server_priority].get(monster.monster_id, etype)}
 
     def _get_edge_or_none(self, monster: MonsterModel, etype: str) -> Optional[int]:
         edges = self._get_edges(monster, etype)
@@ -461,18 +927,13 @@ class MonsterGraph:
 
     def _get_edge_model_set(self, monster: MonsterModel, etype: str) -> Set[BaseModel]:
         possible_results = set()
-        for atlas in self.graph_dict[monster.server_priority][monster.monster_id].values():
-            for edge in atlas.values():
-                if edge.get('type') == etype:
-                    possible_results.update(edge['models'])
+        for _, edge in self._edge_indexes[monster.server_priority].get(monster.monster_id, etype):
+            possible_results.update(edge['models'])
         return possible_results
 
     def _get_newest_edge_model(self, monster: MonsterModel, etype: str) -> Optional[BaseModel]:
-        possible_results = set()
-        for atlas in self.graph_dict[monster.server_priority][monster.monster_id].values():
-            for edge in atlas.values():
-                if edge.get('type') == etype:
-                    possible_results.add(edge['model'])
+        possible_results = {edge['model']
+                            for _, edge in self._edge_indexes[monster.server_priority].get(monster.monster_id, etype)}
         if possible_results:
             return min(possible_results, key=lambda x: x.tstamp)
 
@@ -489,6 +950,14 @@ class MonsterGraph:
         # TODO: log which node doesn't exist? Or unneeded bc we will do that at startup
         return {mdata['model'] for mdata in self.graph_dict[server].nodes.values() if mdata.get('model')}
 
+    def get_ordered_monsters(self, server: Server) -> Tuple[MonsterModel, ...]:
+        """Every monster on a server, ordered by monster id"""
+        return self._ordered_monsters[server]
+
+    def get_monster_ordinals(self, server: Server) -> Mapping[int, int]:
+        """The position of each monster id in get_ordered_monsters"""
+        return self._monster_ordinals[server]
+
     def get_evo_tree(self, monster: MonsterModel) -> List[MonsterModel]:
         while (prev := self.get_prev_evolution(monster)):
             monster = prev
@@ -552,6 +1021,11 @@ class MonsterGraph:
                                self.get_monster(monster.monster_id + 50_000, server=monster.server_priority)])}
 
     def get_base_id(self, monster) -> int:
+        if (table := self._evo_table(monster)) is not None:
+            return table.base_id[monster.monster_id]
+        return self._find_base_id(monster)
+
+    def _find_base_id(self, monster) -> int:
         # This fixes DMG.  I *hate* DMG.
         if monster.base_evo_id == 5802:
             return 5810
@@ -578,6 +1052,11 @@ class MonsterGraph:
         return self.get_base_id(monster) == monster.monster_id
 
     def get_transform_base(self, monster: MonsterModel) -> MonsterModel:
+        if (table := self._evo_table(monster)) is not None:
+            return self.get_monster(table.transform_base[monster.monster_id], server=monster.server_priority)
+        return self._find_transform_base(monster)
+
+    def _find_transform_base(self, monster: MonsterModel) -> MonsterModel:
         # NOTE: This assumes that no two monsters will transform to the same monster. This
         #        also doesn't work for monsters like DMG which are transforms but also base
         #        cards.  This also assumes that the "base" monster will be the lowest id in
@@ -608,10 +1087,20 @@ class MonsterGraph:
         return self._get_newest_edge_model(monster, 'back_evolution')
 
     def monster_is_reversible_evo(self, monster: MonsterModel) -> bool:
+        if (table := self._evo_table(monster)) is not None:
+            return table.has_flag(monster.monster_id, EvoTable.REVERSIBLE)
+        return self._is_reversible_evo(monster)
+
+    def _is_reversible_evo(self, monster: MonsterModel) -> bool:
         prev_evo = self.get_evolution(monster)
         return prev_evo is not None and prev_evo.reversible
 
     def monster_is_reincarnated(self, monster: MonsterModel) -> bool:
+        if (table := self._evo_table(monster)) is not None:
+            return table.has_flag(monster.monster_id, EvoTable.REINCARNATED)
+        return self._is_reincarnated(monster)
+
+    def _is_reincarnated(self, monster: MonsterModel) -> bool:
         if self.monster_is_reversible_evo(monster):
             return False
         while (monster := self.get_prev_evolution(monster)):
@@ -620,17 +1109,29 @@ class MonsterGraph:
         return False
 
     def monster_is_normal_evo(self, monster: MonsterModel) -> bool:
+        if (table := self._evo_table(monster)) is not None:
+            return table.has_flag(monster.monster_id, EvoTable.NORMAL)
         return not (self.monster_is_reversible_evo(monster)
                     or self.monster_is_reincarnated(monster)
                     or self.monster_is_base(monster))
 
     def monster_is_first_evo(self, monster: MonsterModel) -> bool:
+        if (table := self._evo_table(monster)) is not None:
+            return table.has_flag(monster.monster_id, EvoTable.FIRST)
+        return self._is_first_evo(monster)
+
+    def _is_first_evo(self, monster: MonsterModel) -> bool:
         prev = self.get_prev_evolution(monster)
         if prev:
             return self.get_prev_evolution(prev) is None
         return False
 
     def monster_is_second_ultimate(self, monster: MonsterModel) -> bool:
+        if (table := self._evo_table(monster)) is not None:
+            return table.has_flag(monster.monster_id, EvoTable.SECOND_ULTIMATE)
+        return self._is_second_ultimate(monster)
+
+    def _is_second_ultimate(self, monster: MonsterModel) -> bool:
         if self.monster_is_reversible_evo(monster):
             prev = self.get_prev_evolution(monster)
             if prev is not None:
@@ -638,6 +1139,11 @@ class MonsterGraph:
         return False
 
     def true_evo_type(self, monster: MonsterModel) -> InternalEvoType:
+        if (table := self._evo_table(monster)) is not None:
+            return EvoTable.EVO_TYPES[table.evo_type[monster.monster_id]]
+        return self._find_true_evo_type(monster)
+
+    def _find_true_evo_type(self, monster: MonsterModel) -> InternalEvoType:
         if monster.is_equip:
             return InternalEvoType.Assist
         if self.monster_is_base(monster):
@@ -741,6 +1247,11 @@ class MonsterGraph:
         return ret
 
     def get_monster_depth(self, monster: MonsterModel) -> float:
+        if (table := self._evo_table(monster)) is not None:
+            return table.depth[monster.monster_id]
+        return self._find_monster_depth(monster)
+
+    def _find_monster_depth(self, monster: MonsterModel) -> float:
         if monster.monster_id == 5802:
             # DMG sucks!
             return 0
@@ -4,23 +4,27 @@ import io
 import logging
 import re
 from collections import defaultdict
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar
 
 import aiohttp
-from redbot.core.utils import AsyncIter
 from tsutils.enums import Server
 from tsutils.formatting import contains_ja
 
+from dbcog.find_monster.priority import StaticPriority, get_static_priority
 from dbcog.find_monster.token_mappings import ALL_TOKEN_DICTS, AWOKEN_SKILL_MAP, EVO_MAP, EvoTypes, \
     HAZARDOUS_IN_NAME_MODS, KNOWN_MODIFIERS, LEGAL_END_TOKENS, MISC_MAP, MULTI_WORD_TOKENS, MiscModifiers, \
     PROBLEMATIC_SERIES_TOKENS, TYPE_MAP
 from .errors import InvalidGraphState
 from .models.enum_types import Attribute, AwokenSkills, DEFAULT_SERVER
+from .modifier_index import ModifierIndex
 from .models.monster_model import MonsterModel
 from .monster_graph import MonsterGraph
+from .name_token_index import NameTokenIndex
 
 logger = logging.getLogger('red.pad-cogs.dbcog.monster_index')
 
+T = TypeVar('T')
+
 SHEETS_PATTERN = 'https://docs.google.com/spreadsheets/d/1EoZJ3w5xsXZ67kmarLE4vfrZSIIIAfj04HXeZVST3eY' \
                  '/pub?gid={}&single=true&output=csv'
 CARDNAME_OVERRIDE_SHEET = SHEETS_PATTERN.format(0)
@@ -29,12 +33,42 @@ CARD_MODIFIER_OVERRIDE_SHEET = SHEETS_PATTERN.format(2089525837)
 TREE_MODIFIER_OVERRIDE_SHEET = SHEETS_PATTERN.format(1372419168)
 CONTENT_TOKEN_ALIAS_SHEET = SHEETS_PATTERN.format(1229125459)
 SERIES_OVERRIDES_SHEET = SHEETS_PATTERN.format(959933643)
+INDEX_SHEETS = (
+    CARDNAME_OVERRIDE_SHEET,
+    TREENAME_OVERRIDES_SHEET,
+    CARD_MODIFIER_OVERRIDE_SHEET,
+    TREE_MODIFIER_OVERRIDE_SHEET,
+    CONTENT_TOKEN_ALIAS_SHEET,
+    SERIES_OVERRIDES_SHEET,
+)
 
 
 class MonsterIndex:
     def __init__(self, server: Server = DEFAULT_SERVER):
-        self.is_ready = asyncio.Event()
+        self.is_ready: Optional[asyncio.Event] = asyncio.Event()
         self.server = server
+        self._clear()
+
+        self.graph: Optional[MonsterGraph] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['is_ready']
+        state['mwt_to_len'] = dict(self.mwt_to_len)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.mwt_to_len = defaultdict(lambda: 1, state['mwt_to_len'])
+        # Snapshots are read in an executor, so the event is made by set_ready once the index is on the loop
+        self.is_ready = None
+
+    async def reset(self, graph: MonsterGraph, sheets: Optional[Dict[str, str]] = None):
+        self.is_ready.clear()
+        self._clear()
+        await self.setup(graph, sheets)
+
+    def _clear(self):
         self.issues = []
 
         self.monster_id_to_cardname = defaultdict(set)
@@ -48,6 +82,7 @@ class MonsterIndex:
         self.manual_removed_modifiers = defaultdict(set)
 
         self.all_name_tokens = {}
+        self.name_token_index = NameTokenIndex(())
         self.manual = {}
         self.manual_cardnames = defaultdict(set)
         self.manual_treenames = defaultdict(set)
@@ -59,48 +94,116 @@ class MonsterIndex:
         self.modifiers = defaultdict(set)
         self.suffixes = set()
 
+        self.priorities: Dict[MonsterModel, StaticPriority] = {}
+        self.modifier_index = ModifierIndex({}, (), {})
+
         self.multi_word_tokens = {}
         self.mwtoken_creators = defaultdict(set)
         self.mwt_to_len = defaultdict(lambda: 1)
 
-        self.graph: Optional[MonsterGraph] = None
+        # Facts shared by a whole evo tree, only kept while the index is being built
+        self._tree_facts: Dict[Tuple[int, Any], Any] = {}
 
-    async def reset(self, graph: MonsterGraph):
-        self.is_ready.clear()
-        self.issues = []
+    async def setup(self, graph: MonsterGraph, sheets: Optional[Dict[str, str]] = None):
+        if sheets is None:
+            sheets = await download_index_sheets()
+        await asyncio.get_running_loop().run_in_executor(None, self.build, graph, sheets)
+        self.is_ready.set()
 
+    def build(self, graph: MonsterGraph, sheets: Dict[str, str]):
+        """Build the index from scratch.  This blocks for a long time, so run it in an executor."""
+        self.graph = graph
+        monsters = graph.get_all_monsters(self.server)
+
+        self._load_sheets(graph, monsters, sheets)
+        self._build_monster_index(monsters)
+        self._finalize()
+
+    def set_ready(self) -> None:
+        """Mark the index as ready for lookups.  This must be called from the event loop."""
+        if self.is_ready is None:
+            self.is_ready = asyncio.Event()
+        self.is_ready.set()
+
+    def copy(self) -> "MonsterIndex":
+        """A copy of this index that can be updated without affecting lookups on the original.
+
+        This can run in an executor.  The copy has no is_ready event until set_ready is called on it, since
+        an Event can only be made on the event loop's thread before Python 3.10.
+        """
+        index = MonsterIndex.__new__(MonsterIndex)
+        index.__dict__.update({k: v for k, v in self.__dict__.items() if k != 'is_ready'})
+        index.is_ready = None
+        for attr in ('manual_cardnames', 'manual_treenames', 'name_tokens', 'fluff_tokens', 'modifiers'):
+            setattr(index, attr, copydict(getattr(self, attr)))
+        index.priorities = self.priorities.copy()
+        return index
+
+    def update(self, graph: MonsterGraph, changed_ids: Set[int], sheets: Dict[str, str]):
+        """Reindex only the monsters affected by an incremental graph refresh.
+
+        changed_ids should come from MonsterGraph.refresh, and sheets must be the same sheets the index
+        was last built from.  Falls back to a full rebuild if the change affects tokens across all monsters.
+        This modifies the index in place, so only call it on a copy that isn't being used for lookups.
+        """
+        old_pantheon_nicknames = self.series_id_to_pantheon_nickname
+        old_multi_word_tokens = self.multi_word_tokens
+        old_issues = self.issues
+
+        self.issues = []
         self.monster_id_to_cardname = defaultdict(set)
         self.monster_id_to_treename = defaultdict(set)
         self.treename_overrides = set()
         self.monster_id_to_name = defaultdict(set)
         self.monster_id_to_forcedfluff = defaultdict(set)
-        self.series_id_to_pantheon_nickname = defaultdict(set)
         self.content_token_aliases = defaultdict(set)
         self.manual_modifiers = defaultdict(set)
         self.manual_removed_modifiers = defaultdict(set)
-
-        self.all_name_tokens = {}
-        self.manual = {}
-        self.manual_cardnames = defaultdict(set)
-        self.manual_treenames = defaultdict(set)
-        self.name_tokens = defaultdict(set)
-        self.fluff_tokens = defaultdict(set)
-
-        self.all_modifiers = set()
-        self._known_mods = set()
-        self.modifiers = defaultdict(set)
-        self.suffixes = set()
-
-        self.multi_word_tokens = {}
         self.mwtoken_creators = defaultdict(set)
-        self.mwt_to_len = defaultdict(lambda: 1)
-
-        await self.setup(graph)
 
-    async def setup(self, graph: MonsterGraph):
         self.graph = graph
-        monsters = graph.get_all_monsters(self.server)
+        self._load_sheets(graph, graph.get_all_monsters(self.server), sheets)
 
+        if self.series_id_to_pantheon_nickname != old_pantheon_nicknames \
+                or self.multi_word_tokens != old_multi_word_tokens:
+            self._clear()
+            self.build(graph, sheets)
+            return
+
+        # Modifiers and tokens depend on a monster's whole tree, its materials, its exchanges, and
+        # whether its NA/JP counterpart exists
+        nx_graph = graph.graph_dict[self.server]
+        affected = set()
+        for mid in changed_ids:
+            affected.update((mid, mid + 50000, mid - 50000))
+            if mid in nx_graph:
+                affected.update(nx_graph.successors(mid))
+                affected.update(nx_graph.predecessors(mid))
+        for mid in list(affected):
+            monster = graph.get_monster(mid, server=self.server)
+            if monster:
+                affected.update(graph.get_alt_ids(monster))
+
+        for token_dict in (self.manual_cardnames, self.manual_treenames, self.name_tokens, self.fluff_tokens):
+            for token in list(token_dict):
+                token_dict[token] = {m for m in token_dict[token] if m.monster_id not in affected}
+                if not token_dict[token]:
+                    del token_dict[token]
+        for m in list(self.modifiers):
+            if m.monster_id in affected:
+                del self.modifiers[m]
+        for m in list(self.priorities):
+            if m.monster_id in affected:
+                del self.priorities[m]
+
+        monsters = [graph.get_monster(mid, server=self.server) for mid in sorted(affected)]
+        monsters = [m for m in monsters if m]
+        self._build_monster_index(monsters)
+
+        self.issues.extend(issue for issue in old_issues if issue not in self.issues)
+        self._finalize()
+
+    def _load_sheets(self, graph: MonsterGraph, monsters: Set[MonsterModel], sheets: Dict[str, str]):
         self.series_id_to_pantheon_nickname = \
             defaultdict(set, {m.series_id: {m.series.name_en.lower().replace(" ", "")}
                               for m in monsters
@@ -111,18 +214,18 @@ class MonsterIndex:
                                   in monsters
                                   if " " in m.series.name_en.strip()}.union(MULTI_WORD_TOKENS)
 
-        treenames_data, nickname_data, pantheon_data, nt_alias_data, treemod_data, mod_data = await asyncio.gather(
-            sheet_to_reader(TREENAME_OVERRIDES_SHEET,
+        treenames_data, nickname_data, pantheon_data, nt_alias_data, treemod_data, mod_data = (
+            sheet_to_reader(sheets[TREENAME_OVERRIDES_SHEET],
                             ('base_id', 'new_treename', 'normal_prio', 'overrides')),
-            sheet_to_reader(CARDNAME_OVERRIDE_SHEET,
+            sheet_to_reader(sheets[CARDNAME_OVERRIDE_SHEET],
                             ('monster_id', 'name_en', 'normal_prio', 'overrides', 'fluff')),
-            sheet_to_reader(SERIES_OVERRIDES_SHEET,
+            sheet_to_reader(sheets[SERIES_OVERRIDES_SHEET],
                             ('series_id', 'alias')),
-            sheet_to_reader(CONTENT_TOKEN_ALIAS_SHEET,
+            sheet_to_reader(sheets[CONTENT_TOKEN_ALIAS_SHEET],
                             ('tokens', 'alias')),
-            sheet_to_reader(TREE_MODIFIER_OVERRIDE_SHEET,
+            sheet_to_reader(sheets[TREE_MODIFIER_OVERRIDE_SHEET],
                             ('base_id', 'modifiers')),
-            sheet_to_reader(CARD_MODIFIER_OVERRIDE_SHEET,
+            sheet_to_reader(sheets[CARD_MODIFIER_OVERRIDE_SHEET],
                             ('monster_id', 'modifiers', 'remove')),
         )
 
@@ -220,19 +323,22 @@ class MonsterIndex:
         self._known_mods = {x for xs in self.series_id_to_pantheon_nickname.values()
                             for x in xs}.union(KNOWN_MODIFIERS)
 
-        await self._build_monster_index(monsters)
-
+    def _finalize(self):
         self.manual = combine_tokens_dicts(self.manual_cardnames, self.manual_treenames)
         self.all_name_tokens = combine_tokens_dicts(self.manual, self.fluff_tokens, self.name_tokens)
         self.all_modifiers = {p for ps in self.modifiers.values() for p in ps}
+        self.modifier_index = ModifierIndex(self.modifiers, self.graph.get_ordered_monsters(self.server),
+                                            self.graph.get_monster_ordinals(self.server))
         self.suffixes = LEGAL_END_TOKENS
         self.mwt_to_len = defaultdict(lambda: 1, {"".join(mw): len(mw) for mw in self.multi_word_tokens})
+        self.name_token_index = NameTokenIndex(self.all_name_tokens,
+                                               (mw for mw, length in self.mwt_to_len.items() if length != 1))
 
-        self.is_ready.set()
-
-    async def _build_monster_index(self, monsters):
-        async for m in AsyncIter(monsters):
-            self.modifiers[m] = await self.get_modifiers(m)
+    def _build_monster_index(self, monsters):
+        self._tree_facts = {}
+        for m in monsters:
+            self.modifiers[m] = self.get_modifiers(m)
+            self.priorities[m] = get_static_priority(self.graph, m)
 
             # ID
             self.manual_cardnames[str(m.monster_no)].add(m)
@@ -325,6 +431,7 @@ class MonsterIndex:
             base_id = self.graph.get_base_id(m)
             for nick in self.monster_id_to_treename[base_id]:
                 self.add_manual_tree_token(nick, m)
+        self._tree_facts = {}
 
     def add_name_token(self, token, monster):
         if monster in self.fluff_tokens[token.lower()]:
@@ -383,7 +490,7 @@ class MonsterIndex:
         else:
             return cls._name_to_tokens(min(n1, n2, key=token_count))
 
-    async def get_modifiers(self, monster: MonsterModel):
+    def get_modifiers(self, monster: MonsterModel):
         modifiers = self.manual_modifiers[monster.monster_id].union({'monster'})
 
         basemon = self.graph.get_base_monster(monster)
@@ -420,44 +527,44 @@ class MonsterIndex:
                        monster.is_equip or '極醒' in monster.name_ja)
 
         # Evo
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.EVO],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.EVO, EVO_MAP[EvoTypes.EVO],
                                    lambda m: (self.graph.monster_is_normal_evo(m)
                                               or self.graph.monster_is_first_evo(m)))
 
         # Uvo
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.UVO],
+        self.add_numbered_modifier(monster, modifiers, (EvoTypes.UVO, special_evo), EVO_MAP[EvoTypes.UVO],
                                    lambda m: (self.graph.monster_is_reversible_evo(m)
                                               and not special_evo))
 
         # UUvo
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.UUVO],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.UUVO, EVO_MAP[EvoTypes.UUVO],
                                    self.graph.monster_is_second_ultimate)
 
         # Transform
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.TRANS],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.TRANS, EVO_MAP[EvoTypes.TRANS],
                                    lambda m: not self.graph.monster_is_transform_base(m))
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.BASETRANS],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.BASETRANS, EVO_MAP[EvoTypes.BASETRANS],
                                    lambda m: (self.graph.monster_is_transform_base(m)
                                               and self.graph.get_next_transforms(m)))
 
         # Awoken
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.AWOKEN],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.AWOKEN, EVO_MAP[EvoTypes.AWOKEN],
                                    lambda m: '覚醒' in m.name_ja or 'awoken' in m.name_en.lower())
 
         # Mega Awoken
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.MEGA],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.MEGA, EVO_MAP[EvoTypes.MEGA],
                                    lambda m: '極醒' in m.name_ja or 'mega awoken' in m.name_en.lower())
 
         # Reincarnated
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.REVO],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.REVO, EVO_MAP[EvoTypes.REVO],
                                    lambda m: self.graph.true_evo_type(m).value == "Reincarnated")
 
         # Super Reincarnated
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.SREVO],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.SREVO, EVO_MAP[EvoTypes.SREVO],
                                    lambda m: self.graph.true_evo_type(m).value == "Super Reincarnated")
 
         # Pixel
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.PIXEL],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.PIXEL, EVO_MAP[EvoTypes.PIXEL],
                                    lambda m: (m.name_ja.startswith('ドット') or m.name_en.startswith('pixel')
                                               or self.graph.true_evo_type(m).value == "Pixel"),
                                    else_mods=EVO_MAP[EvoTypes.NONPIXEL])
@@ -473,11 +580,11 @@ class MonsterIndex:
                 self.issues.append(f"Invalid awoken skill ID: {aw.awoken_skill_id}")
 
         # Equips
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.EQUIP],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.EQUIP, EVO_MAP[EvoTypes.EQUIP],
                                    lambda m: m.is_equip)
 
         # Chibi
-        self.add_numbered_modifier(monster, modifiers, EVO_MAP[EvoTypes.CHIBI],
+        self.add_numbered_modifier(monster, modifiers, EvoTypes.CHIBI, EVO_MAP[EvoTypes.CHIBI],
                                    lambda m: (m.name_en == m.name_en.lower() and m.name_en != m.name_ja
                                               or 'ミニ' in m.name_ja or '(chibi)' in m.name_en))
 
@@ -522,47 +629,52 @@ class MonsterIndex:
             modifiers.update(MISC_MAP[MiscModifiers.NEW])
 
         # Method of Obtaining
-        if self.graph.monster_is_farmable_evo(monster) or self.graph.monster_is_mp_evo(monster):
+        if self._tree_fact(monster, 'farmable', self.graph.monster_is_farmable_evo) \
+                or self._tree_fact(monster, 'mp', self.graph.monster_is_mp_evo):
             modifiers.update(MISC_MAP[MiscModifiers.FARMABLE])
-        if self.graph.monster_is_pem_evo(monster):
+        if self._tree_fact(monster, 'pem', self.graph.monster_is_pem_evo):
             modifiers.update(MISC_MAP[MiscModifiers.PEM])
-        if self.graph.monster_is_vem_evo(monster):
+        if self._tree_fact(monster, 'vem', self.graph.monster_is_vem_evo):
             modifiers.update(MISC_MAP[MiscModifiers.ADPEM])
         if monster.in_vem:
             modifiers.update(MISC_MAP[MiscModifiers.INADPEM])
 
-        if self.graph.monster_is_rem_evo(monster):
+        if self._tree_fact(monster, 'rem', self.graph.monster_is_rem_evo):
             modifiers.update(MISC_MAP[MiscModifiers.REM])
         else:
             try:
                 if self.graph.monster_is_vendor_exchange(monster):
                     modifiers.update(MISC_MAP[MiscModifiers.MEDAL_EXC])
-                    if self.graph.monster_is_black_medal_exchange_evo(monster):
+                    if self._tree_fact(monster, 'black_medal_exchange',
+                                       self.graph.monster_is_black_medal_exchange_evo):
                         modifiers.update(MISC_MAP[MiscModifiers.BLACK_MEDAL])
-                    if self.graph.monster_is_currently_exchangable_evo(monster, Server.JP):
+                    if self._tree_fact(monster, ('currently_exchangable', Server.JP),
+                                       lambda m: self.graph.monster_is_currently_exchangable_evo(m, Server.JP)):
                         modifiers.update(MISC_MAP[MiscModifiers.CURRENT_EXCHANGE_JP])
-                    if self.graph.monster_is_currently_exchangable_evo(monster, Server.NA):
+                    if self._tree_fact(monster, ('currently_exchangable', Server.NA),
+                                       lambda m: self.graph.monster_is_currently_exchangable_evo(m, Server.NA)):
                         modifiers.update(MISC_MAP[MiscModifiers.CURRENT_EXCHANGE_NA])
-                    if self.graph.monster_is_currently_exchangable_evo(monster, Server.KR):
+                    if self._tree_fact(monster, ('currently_exchangable', Server.KR),
+                                       lambda m: self.graph.monster_is_currently_exchangable_evo(m, Server.KR)):
                         modifiers.update(MISC_MAP[MiscModifiers.CURRENT_EXCHANGE_KR])
-                    if self.graph.monster_is_permanent_exchange_evo(monster):
+                    if self._tree_fact(monster, 'permanent_exchange', self.graph.monster_is_permanent_exchange_evo):
                         modifiers.update(MISC_MAP[MiscModifiers.PERMANENT_EXCHANGE])
                     else:
                         modifiers.update(MISC_MAP[MiscModifiers.TEMP_EXCHANGE])
 
             except InvalidGraphState:
                 pass
-            if self.graph.monster_is_mp_evo(monster):
+            if self._tree_fact(monster, 'mp', self.graph.monster_is_mp_evo):
                 modifiers.update(MISC_MAP[MiscModifiers.MP])
 
         if monster.sell_mp < 100:
             modifiers.update(MISC_MAP[MiscModifiers.TRADEABLE])
 
         # Art
-        if self.graph.monster_is_orb_skin_evo(monster):
+        if self._tree_fact(monster, 'orb_skin', self.graph.monster_is_orb_skin_evo):
             modifiers.update(MISC_MAP[MiscModifiers.ORBSKIN])
             modifiers.update(MISC_MAP[MiscModifiers.MEDIA])
-        if self.graph.monster_is_bgm_evo(monster):
+        if self._tree_fact(monster, 'bgm', self.graph.monster_is_bgm_evo):
             modifiers.update(MISC_MAP[MiscModifiers.BGM])
             modifiers.update(MISC_MAP[MiscModifiers.MEDIA])
         if monster.has_animation:
@@ -590,20 +702,45 @@ class MonsterIndex:
 
         return modifiers
 
-    def add_numbered_modifier(self, monster, curr_mods, added_mods, condition, *, else_mods=None):
-        if condition(monster):
+    def add_numbered_modifier(self, monster, curr_mods, key, added_mods, condition, *, else_mods=None):
+        """Add added_mods if condition holds, numbered by position among the monsters in the tree it holds for
+
+        The matching monsters are computed once per tree and cached under key, so key must uniquely
+        identify the condition.
+        """
+        def positions(m):
+            ms = [alt for alt in self.graph.get_alt_monsters(m) if condition(alt)]
+            return {alt.monster_id: c for c, alt in enumerate(ms)}
+
+        matches = self._tree_fact(monster, ('numbered', key), positions)
+        if monster.monster_id in matches:
             curr_mods.update(added_mods)
-            ms = [m for m in self.graph.get_alt_monsters(monster) if condition(m)]
-            if len(ms) > 1:
-                curr_mods.update(f'{mod}-{ms.index(monster) + 1}' for mod in added_mods)
+            if len(matches) > 1:
+                curr_mods.update(f'{mod}-{matches[monster.monster_id] + 1}' for mod in added_mods)
         elif else_mods:
             curr_mods.update(else_mods)
 
+    def _tree_fact(self, monster: MonsterModel, key: Any, compute: Callable[[MonsterModel], T]) -> T:
+        """Memoize a fact that's the same for every monster in an evo tree while the index is being built"""
+        tree_key = (self.graph.get_alt_ids(monster)[0], key)
+        if tree_key not in self._tree_facts:
+            self._tree_facts[tree_key] = compute(monster)
+        return self._tree_facts[tree_key]
+
 
-async def sheet_to_reader(url, headers) -> List[Dict[str, str]]:
+async def download_index_sheets() -> Dict[str, str]:
     async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            reader = csv.reader(io.StringIO(await response.text()), delimiter=',')
+        texts = await asyncio.gather(*(download_sheet(session, url) for url in INDEX_SHEETS))
+    return dict(zip(INDEX_SHEETS, texts))
+
+
+async def download_sheet(session: aiohttp.ClientSession, url: str) -> str:
+    async with session.get(url) as response:
+        return await response.text()
+
+
+def sheet_to_reader(text, headers) -> List[Dict[str, str]]:
+    reader = csv.reader(io.StringIO(text), delimiter=',')
     next(reader)
     return [dict(zip(headers, line[:len(headers)])) for line in reader]
 
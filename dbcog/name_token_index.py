@@ -0,0 +1,65 @@
+from bisect import bisect_left
+from collections import defaultdict
+from math import floor
+from typing import Dict, Iterable, List, Mapping, Set
+
+
+class NameTokenIndex:
+    """Candidate pruning for fuzzy name token lookups.
+
+    Jaro-Winkler can't be indexed directly, but it can be bounded.  Two strings with different first
+    characters get no prefix bonus, so their score is at most (m/a + m/b + 1) / 3, where m is the number
+    of characters they share.  For each token length we know the minimum number of shared characters a
+    token needs to score above the threshold, so by the pigeonhole principle it must contain at least one
+    of the query's rarest (a - m + 1) characters.  Everything else can be skipped without being scored.
+
+    Tokens that share a first character with the query, multi-word tokens (which are rescaled after
+    scoring), and empty tokens are always returned as candidates.
+    """
+
+    def __init__(self, tokens: Iterable[str], always_score: Iterable[str] = ()):
+        # Preserve the iteration order of the original token dict so that ties sort the same way
+        self.ordinals: Dict[str, int] = {token: c for c, token in enumerate(tokens)}
+        self.sorted_tokens: List[str] = sorted(self.ordinals)
+
+        self.always_score: Set[str] = {token for token in always_score if token in self.ordinals}
+        self.by_first_char: Mapping[str, Set[str]] = defaultdict(set)
+        self.by_length_and_char: Dict[int, Mapping[str, Set[str]]] = {}
+
+        for token in self.ordinals:
+            if not token:
+                self.always_score.add(token)
+                continue
+            self.by_first_char[token[0]].add(token)
+            postings = self.by_length_and_char.setdefault(len(token), defaultdict(set))
+            for char in set(token):
+                postings[char].add(token)
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def candidates(self, value: str, threshold: float) -> List[str]:
+        """All tokens that could possibly score above threshold against value, in original order"""
+        if not value or 3 * threshold - 1 <= 0:
+            return list(self.ordinals)
+
+        a = len(value)
+        candidates = set(self.always_score)
+        candidates.update(self.by_first_char.get(value[0], ()))
+        for b, postings in self.by_length_and_char.items():
+            min_shared = floor((3 * threshold - 1) * a * b / (a + b) - 1e-9) + 1
+            if min_shared > min(a, b):
+                continue
+            rarest = sorted(value, key=lambda char: len(postings.get(char, ())))[:a - min_shared + 1]
+            for char in rarest:
+                candidates.update(postings.get(char, ()))
+        return sorted(candidates, key=self.ordinals.__getitem__)
+
+    def prefixed(self, value: str) -> List[str]:
+        """All tokens that start with value, in original order"""
+        if not value:
+            return list(self.ordinals)
+        upper = value[:-1] + chr(ord(value[-1]) + 1)
+        start = bisect_left(self.sorted_tokens, value)
+        end = bisect_left(self.sorted_tokens, upper, lo=start)
+        return sorted(self.sorted_tokens[start:end], key=self.ordinals.__getitem__)
@@ -0,0 +1,131 @@
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Set, Tuple
+
+from networkx import MultiDiGraph
+
+Adjacency = Mapping[int, Mapping[int, Dict[str, Any]]]
+
+
+class OverlayGraph:
+    """A server's monster graph whose edges are stored as a delta on top of another server's graph.
+
+    Almost every monster has exactly the same edges on NA as it does in COMBINED, so rather than keeping
+    a second full set of adjacency dicts, the overlay only stores the outgoing edges of monsters whose edges
+    differ from the base graph.  The edges of shared nodes are read straight from the base.
+
+    Only the edges are deduplicated.  Node attributes (the model and alt versions) always belong to the
+    overlay, because every model records its own server in server_priority and the lookups resolve the
+    server through it.  The server's models are still built and stored in full, so this saves the memory of
+    the edge dicts but not the models, and it doesn't make the server's graph any faster to build.
+
+    Nodes are added with no edges of their own.  Call share once a node's edges are known to match the base,
+    and detach before the base's edges of a shared node change.
+
+    This implements the part of the MultiDiGraph interface that MonsterGraph and MonsterIndex use.
+    """
+
+    def __init__(self, base: MultiDiGraph):
+        self.base = base
+        self._nodes: Dict[int, Dict[str, Any]] = {}
+        # Outgoing edges of every node that doesn't share the base graph's edges
+        self._adj: Dict[int, Dict[int, Dict[int, Dict[str, Any]]]] = {}
+
+    @property
+    def nodes(self) -> Dict[int, Dict[str, Any]]:
+        return self._nodes
+
+    def __contains__(self, mid: int) -> bool:
+        return mid in self._nodes
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __getitem__(self, mid: int) -> Adjacency:
+        if mid not in self._nodes:
+            raise KeyError(mid)
+        return self._adjacency(mid)
+
+    def _adjacency(self, mid: int) -> Adjacency:
+        if mid in self._adj:
+            return self._adj[mid]
+        if mid in self.base:
+            return self.base[mid]
+        return {}
+
+    @property
+    def overridden(self) -> Set[int]:
+        return set(self._adj)
+
+    def detach(self, mids: Iterable[int]) -> None:
+        """Give nodes their own copy of the edges they currently share with the base graph"""
+        for mid in mids:
+            if mid in self._nodes and mid not in self._adj:
+                self._adj[mid] = {to_id: dict(keydict) for to_id, keydict in self._adjacency(mid).items()}
+
+    def share(self, mids: Iterable[int]) -> None:
+        """Go back to reading the edges of nodes from the base graph"""
+        for mid in mids:
+            self._adj.pop(mid, None)
+
+    def add_node(self, mid: int, **attrs) -> None:
+        if mid not in self._nodes:
+            # Like a new node in a MultiDiGraph, this starts without edges until it's shared
+            self._nodes[mid] = {}
+            self._adj[mid] = {}
+        self._nodes[mid].update(attrs)
+
+    def remove_node(self, mid: int) -> None:
+        del self._nodes[mid]
+        self._adj.pop(mid, None)
+
+    def add_edge(self, from_id: int, to_id: int, **attrs) -> int:
+        self.add_node(from_id)
+        self.add_node(to_id)
+        self.detach([from_id])
+        keydict = self._adj[from_id].setdefault(to_id, {})
+        key = len(keydict)
+        while key in keydict:
+            key += 1
+        keydict[key] = attrs
+        return key
+
+    def out_edges(self, mid: int, keys: bool = False) -> List[Tuple]:
+        if keys:
+            return [(mid, to_id, key) for to_id, keydict in self._adjacency(mid).items() for key in keydict]
+        return [(mid, to_id) for to_id, keydict in self._adjacency(mid).items() for _ in keydict]
+
+    def remove_edges_from(self, edges: Iterable[Tuple[int, int, int]]) -> None:
+        for from_id, to_id, key in edges:
+            self.detach([from_id])
+            keydict = self._adj[from_id][to_id]
+            del keydict[key]
+            if not keydict:
+                del self._adj[from_id][to_id]
+
+    def successors(self, mid: int) -> Iterator[int]:
+        return iter(self[mid])
+
+    def predecessors(self, mid: int) -> Iterator[int]:
+        if mid not in self._nodes:
+            raise KeyError(mid)
+        preds = set()
+        if mid in self.base:
+            preds.update(from_id for from_id in self.base.predecessors(mid)
+                         if from_id in self._nodes and from_id not in self._adj)
+        preds.update(from_id for from_id, adj in self._adj.items() if mid in adj and from_id in self._nodes)
+        return iter(preds)
+
+    def degree(self, mid: int) -> int:
+        out_degree = sum(len(keydict) for keydict in self[mid].values())
+        in_degree = sum(len(self._adjacency(from_id)[mid]) for from_id in self.predecessors(mid))
+        return out_degree + in_degree
+
+    def copy(self, base: MultiDiGraph) -> "OverlayGraph":
+        """A copy of this overlay on top of a (usually copied) base graph"""
+        overlay = OverlayGraph(base)
+        overlay._nodes = {mid: dict(attrs) for mid, attrs in self._nodes.items()}
+        overlay._adj = {mid: {to_id: dict(keydict) for to_id, keydict in adj.items()}
+                        for mid, adj in self._adj.items()}
+        return overlay
@@ -0,0 +1,95 @@
+"""
+On-disk snapshots of the monster graph and indexes.
+
+Building the graph and every index from scratch takes a long time, so after each build we pickle
+them to disk along with hashes of the inputs they were built from.  On startup the snapshot can be
+loaded in a few seconds, and the regular refresh only rebuilds once the inputs have changed.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from tsutils.enums import Server
+
+from .monster_graph import MonsterGraph
+from .monster_index import MonsterIndex
+
+logger = logging.getLogger('red.padbot-cogs.dbcog.snapshot')
+
+# Bump this whenever the pickled layout of MonsterGraph, MonsterIndex, or any model changes
+SNAPSHOT_VERSION = 9
+SNAPSHOT_MAGIC = b'DBCOGSNAP'
+
+# Egg machine and exchange availability depend on the current time, so don't trust a snapshot forever
+SNAPSHOT_MAX_AGE = 60 * 60 * 24
+
+
+class SnapshotKey(NamedTuple):
+    db_hash: str
+    sheets_hash: str
+    debug_monster_ids: Optional[List[int]]
+
+
+class Snapshot(NamedTuple):
+    key: SnapshotKey
+    created: float
+    graph: MonsterGraph
+    indexes: Dict[Server, MonsterIndex]
+
+
+def snapshot_expired(created: float) -> bool:
+    return time.time() - created > SNAPSHOT_MAX_AGE
+
+
+def hash_file(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def hash_sheets(sheets: Dict[str, str]) -> str:
+    sha = hashlib.sha256()
+    for url in sorted(sheets):
+        sha.update(url.encode())
+        sha.update(b'\0')
+        sha.update(sheets[url].encode())
+        sha.update(b'\0')
+    return sha.hexdigest()
+
+
+def make_snapshot_key(db_file_path: str, sheets: Dict[str, str],
+                      debug_monster_ids: Optional[List[int]]) -> SnapshotKey:
+    return SnapshotKey(hash_file(db_file_path), hash_sheets(sheets),
+                       sorted(debug_monster_ids) if debug_monster_ids is not None else None)
+
+
+def read_snapshot(path: str) -> Optional[Snapshot]:
+    """Read a snapshot from disk.  Returns None if there's no usable snapshot."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            logger.warning("Ignoring snapshot with invalid header.")
+            return None
+        header = pickle.load(f)
+        if header.get('version') != SNAPSHOT_VERSION:
+            logger.info(f"Ignoring snapshot with version {header.get('version')}.")
+            return None
+        graph, indexes = pickle.load(f)
+    return Snapshot(SnapshotKey(*header['key']), header['created'], graph, indexes)
+
+
+def write_snapshot(path: str, key: SnapshotKey, graph: MonsterGraph, indexes: Dict[Server, MonsterIndex]) -> None:
+    header = {'version': SNAPSHOT_VERSION, 'key': tuple(key), 'created': time.time()}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # The graph and indexes must be pickled together so that they keep sharing the same models
+        pickle.dump((graph, indexes), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
@@ -0,0 +1,123 @@
+import gc
+import os
+import sqlite3
+import tempfile
+import weakref
+
+from tsutils.enums import Server
+
+from dbcog.database_manager import DBCogDatabase
+from dbcog.dungeon_context import DROP_CACHE_SIZE, DungeonContext
+
+SCHEMA = """
+CREATE TABLE dungeons (dungeon_id INTEGER PRIMARY KEY, name_ja TEXT, name_en TEXT, name_ko TEXT, dungeon_type INT);
+CREATE TABLE sub_dungeons (sub_dungeon_id INTEGER PRIMARY KEY, dungeon_id INT, name_ja TEXT, name_en TEXT,
+                           name_ko TEXT, technical INT);
+CREATE TABLE enemy_data (enemy_id INTEGER PRIMARY KEY, behavior BLOB);
+CREATE TABLE encounters (encounter_id INTEGER PRIMARY KEY, dungeon_id INT, sub_dungeon_id INT, enemy_id INT,
+                         monster_id INT, stage INT, amount INT, turns INT, level INT, hp INT, atk INT, defense INT);
+CREATE TABLE drops (drop_id INTEGER PRIMARY KEY, encounter_id INT, monster_id INT);
+"""
+
+
+class FakeMonster:
+    def __init__(self, monster_id):
+        self.monster_id = monster_id
+        self.server_priority = Server.COMBINED
+
+
+def make_database(path):
+    con = sqlite3.connect(path)
+    con.executescript(SCHEMA)
+    for dungeon_id in range(1, 21):
+        con.execute("INSERT INTO dungeons VALUES (?, 'ja', ?, 'ko', 0)", (dungeon_id, f"Dungeon {dungeon_id}"))
+        for sub in range(1, 4):
+            sub_id = dungeon_id * 1000 + sub
+            con.execute("INSERT INTO sub_dungeons VALUES (?, ?, 'ja', ?, 'ko', 0)", (sub_id, dungeon_id, f"Sub {sub}"))
+            for stage in range(1, 6):
+                enemy_id = sub_id * 10 + stage
+                con.execute("INSERT INTO enemy_data VALUES (?, ?)", (enemy_id, b''))
+                cur = con.execute("INSERT INTO encounters VALUES (NULL, ?, ?, ?, ?, ?, 1, 1, 1, 1, 1, 1)",
+                                  (dungeon_id, sub_id, enemy_id, stage, stage))
+                con.execute("INSERT INTO drops VALUES (NULL, ?, ?)", (cur.lastrowid, stage))
+    con.commit()
+    con.close()
+
+
+def use(dungeon):
+    dungeon.get_all_dungeons()
+    dungeon.get_dungeon(1)
+    dungeon.get_encounter(1)
+    for mid in range(1, 6):
+        dungeon.get_subdungeons_from_drop_monster(FakeMonster(mid))
+
+
+def test_reloads_release_old_contexts():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dadguide.sqlite')
+        make_database(path)
+
+        refs = []
+        dungeon = None
+        for _ in range(5):
+            # This is what a reload does: close the old context and build a new one over a new connection
+            if dungeon is not None:
+                dungeon.invalidate()
+                dungeon.database.close()
+            dungeon = DungeonContext(DBCogDatabase(path, read_only=True))
+            use(dungeon)
+            assert len(dungeon.cache) > 0
+            refs.append((weakref.ref(dungeon), weakref.ref(dungeon.get_all_dungeons()[0])))
+
+        gc.collect()
+        for context_ref, model_ref in refs[:-1]:
+            assert context_ref() is None
+            assert model_ref() is None
+        assert refs[-1][0]() is dungeon
+        dungeon.database.close()
+
+
+def test_invalidate_drops_cached_models():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dadguide.sqlite')
+        make_database(path)
+        dungeon = DungeonContext(DBCogDatabase(path, read_only=True))
+        use(dungeon)
+        old_dungeons = dungeon.get_all_dungeons()
+
+        dungeon.invalidate()
+        assert len(dungeon.cache) == 0
+        assert dungeon.get_all_dungeons() is not old_dungeons
+        dungeon.database.close()
+
+
+def test_drop_lookups_are_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dadguide.sqlite')
+        make_database(path)
+        dungeon = DungeonContext(DBCogDatabase(path, read_only=True))
+        for mid in range(DROP_CACHE_SIZE * 2):
+            dungeon.get_subdungeons_from_drop_monster(FakeMonster(mid))
+        assert len(dungeon.cache._lookups) == DROP_CACHE_SIZE
+        dungeon.database.close()
+
+
+def test_floor_lookups_come_from_the_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dadguide.sqlite')
+        make_database(path)
+        con = sqlite3.connect(path)
+        con.execute("INSERT INTO encounters VALUES (NULL, 1, 1001, NULL, 9, -1, 1, 1, 1, 1, 1, 1)")
+        con.commit()
+        con.close()
+        dungeon = DungeonContext(DBCogDatabase(path, read_only=True))
+
+        floor = dungeon.get_floor_from_sub_dungeon(1001, 2, server=Server.COMBINED)
+        assert [(e.stage, e.monster_id) for e in floor] == [(2, 2), (-1, 9)]
+        assert floor[0].enemy_data.enemy_id == 10012
+        assert floor[1].enemy_id is None and floor[1].enemy_data is None
+        assert dungeon.get_floor_from_sub_dungeon(1001, 99, server=Server.COMBINED)[0].stage == -1
+
+        # Paging doesn't touch the database once the store is built
+        dungeon.database.close()
+        assert len(dungeon.get_floor_from_sub_dungeon(1002, 3, server=Server.COMBINED)) == 1
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import tempfile
+
+from networkx import MultiDiGraph
+from tsutils.enums import Server
+
+from dbcog.database_context import DbContext
+from dbcog.database_loader import refresh_database
+from dbcog.database_manager import DBCogDatabase
+from dbcog.dungeon_context import DungeonContext
+from dbcog.modifier_index import ModifierIndex
+from dbcog.monster_graph import GRAPH_SERVERS, MonsterGraph
+
+SCHEMA = """
+CREATE TABLE awoken_skills (awoken_skill_id INTEGER PRIMARY KEY);
+CREATE TABLE series (series_id INTEGER PRIMARY KEY);
+CREATE TABLE encounters (encounter_id INTEGER PRIMARY KEY, sub_dungeon_id INT, enemy_id INT, monster_id INT,
+                         stage INT, amount INT, turns INT, level INT, hp INT, atk INT, defense INT);
+CREATE TABLE enemy_data (enemy_id INTEGER PRIMARY KEY, behavior BLOB);
+"""
+
+
+class FakeMonster:
+    def __init__(self, monster_id, series_id=0):
+        self.monster_id = monster_id
+        self.series_id = series_id
+        self.active_skill_id = monster_id
+        self.leader_skill_id = monster_id
+        self.group_id = 0
+        self.collab_id = 0
+
+
+class FakeGraph(MonsterGraph):
+    """A MonsterGraph over plain nodes, since building a real one needs a full dadguide database"""
+
+    def __init__(self, monsters):
+        self.database = None
+        self.graph_dict = {server: MultiDiGraph() for server in GRAPH_SERVERS}
+        self.pending = []
+        self.add_monsters(monsters)
+        self._number_monsters()
+
+    def add_monsters(self, monsters):
+        for server in GRAPH_SERVERS:
+            for m in monsters:
+                self.graph_dict[server].add_node(m.monster_id, model=m)
+
+    def refresh(self):
+        self.add_monsters(self.pending)
+        self._number_monsters()
+        changed = {server: {m.monster_id for m in self.pending} for server in GRAPH_SERVERS}
+        self.pending = []
+        return changed
+
+
+def make_database(path):
+    con = sqlite3.connect(path)
+    con.executescript(SCHEMA)
+    con.commit()
+    con.close()
+    return DBCogDatabase(path, read_only=True)
+
+
+def test_refresh_adds_new_monsters():
+    with tempfile.TemporaryDirectory() as tmp:
+        database = make_database(os.path.join(tmp, 'dadguide.sqlite'))
+        graph = FakeGraph([FakeMonster(1), FakeMonster(3)])
+        db_context = DbContext(database, graph, DungeonContext(database))
+
+        graph.pending = [FakeMonster(2)]
+        graph.refresh()
+        assert [m.monster_id for m in db_context.get_all_monsters(Server.COMBINED)] == [1, 2, 3]
+        assert list(db_context.get_all_monster_ids(Server.NA)) == [1, 2, 3]
+        assert db_context.get_monster_ordinals(Server.COMBINED) == {1: 0, 2: 1, 3: 2}
+        database.close()
+
+
+def test_modifier_index_shares_the_graph_ordinals():
+    monsters = [FakeMonster(1), FakeMonster(2), FakeMonster(3)]
+    graph = FakeGraph(monsters)
+    index = ModifierIndex({monsters[0]: {'a'}, monsters[2]: {'a', 'b'}},
+                          graph.get_ordered_monsters(Server.COMBINED), graph.get_monster_ordinals(Server.COMBINED))
+
+    assert index.ordinals is graph.get_monster_ordinals(Server.COMBINED)
+    assert index.from_bits(index.bits['a']) == {monsters[0], monsters[2]}
+    assert index.to_bits([monsters[1]]) == 0b010
+    assert index.to_bits([FakeMonster(2)]) is None
+
+
+def test_refreshed_context_indexes_new_monsters():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dadguide.sqlite')
+        old_database = make_database(path)
+        graph = FakeGraph([FakeMonster(1, series_id=7), FakeMonster(3, series_id=8)])
+        old_context = DbContext(old_database, graph, DungeonContext(old_database))
+        assert [m.monster_id for m in old_context.get_monsters_by_series(7, server=Server.COMBINED)] == [1]
+
+        graph.pending = [FakeMonster(2, series_id=7)]
+        db_context, changed_ids = refresh_database(graph, DBCogDatabase(path, read_only=True))
+        assert changed_ids == {2}
+        assert graph.database is db_context.database
+        assert [m.monster_id for m in db_context.get_all_monsters(Server.COMBINED)] == [1, 2, 3]
+        for server in (Server.COMBINED, Server.NA):
+            assert [m.monster_id for m in db_context.get_monsters_by_series(7, server=server)] == [1, 2]
+        assert [m.monster_id for m in db_context.get_monsters_by_active(2, server=Server.COMBINED)] == [2]
+        assert [m.monster_id for m in db_context.get_monsters_by_leader(2, server=Server.NA)] == [2]
+        assert [m.monster_id for m in db_context.get_monsters_by_group(0, server=Server.COMBINED)] == [1, 2, 3]
+        assert [m.monster_id for m in db_context.get_monsters_by_collab(0, server=Server.NA)] == [1, 2, 3]
+        old_database.close()
+        db_context.close()